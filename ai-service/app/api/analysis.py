@@ -0,0 +1,327 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+from app.models.batching import create_micro_batcher
+from app.models.registry import registry
+from app.utils.cache import create_result_cache
+from app.utils.metrics import metrics, stage
+from app.utils.text_processing import Document
+
+if TYPE_CHECKING:
+    from app.models.parallel import BulkAnalyzer
+
+# Bump when the shape or meaning of cached analysis results changes, so a
+# shared cache never serves results produced by older code
+ANALYSIS_SCHEMA = 2
+
+result_cache = create_result_cache()
+
+def _current_version() -> str:
+    # Results depend on the live models and on the sentiment engine in use
+    return (f"{ANALYSIS_SCHEMA}:{registry.get_sentiment_analyzer().engine}:"
+            f"{registry.get_classifier().model_version()}")
+
+def _analyze_uncached(texts: List[str]) -> List[Dict[str, Any]]:
+    """Run classification and sentiment over a batch of texts"""
+    # Both analyzers share each text's normalized views
+    documents = [Document(text) for text in texts]
+    classifications = registry.get_classifier().analyze_batch(documents)
+    with stage('sentiment'):
+        sentiments = registry.get_sentiment_analyzer().analyze_batch(documents)
+    
+    return [
+        {
+            'category': classification.category,
+            'priority': classification.priority,
+            'confidence': classification.confidence,
+            'keywords': list(classification.keywords),
+            'urgency_score': classification.urgency_score,
+            'sentiment': sentiment
+        }
+        for classification, sentiment in zip(classifications, sentiments)
+    ]
+
+# Coalesces concurrent single-text requests into one batch when enabled
+micro_batcher = create_micro_batcher(_analyze_uncached)
+
+def submit_text(text: str) -> Future:
+    """Analysis of one complaint as a Future.
+    
+    Cache hits resolve immediately; misses go through the micro-batcher when
+    it is enabled and are computed inline otherwise.
+    """
+    version = _current_version()
+    if result_cache is not None:
+        cached = result_cache.get(text, version)
+        if cached is not None:
+            future: Future = Future()
+            future.set_result(cached)
+            return future
+    
+    if micro_batcher is not None:
+        future = micro_batcher.submit(text)
+    else:
+        future = Future()
+        try:
+            future.set_result(_analyze_uncached([text])[0])
+        except Exception as e:
+            future.set_exception(e)
+    
+    if result_cache is not None:
+        def store(done: Future) -> None:
+            if done.exception() is None:
+                result_cache.set(text, version, done.result())
+        
+        future.add_done_callback(store)
+    return future
+
+def analyze_text(text: str) -> Dict[str, Any]:
+    """Full analysis of one complaint: classification plus sentiment.
+    
+    Results may be served from the cache and shared between callers, so they
+    must be treated as read-only.
+    """
+    future = submit_text(text)
+    if micro_batcher is None or future.done():
+        return future.result()
+    
+    try:
+        return future.result(timeout=micro_batcher.timeout)
+    except FutureTimeoutError:
+        return analyze_directly(text)
+
+def analyze_directly(text: str) -> Dict[str, Any]:
+    """Analysis of one complaint in the calling thread, for when the micro-batcher is too slow"""
+    print(f"Micro-batcher gave no result within {micro_batcher.timeout * 1000:.0f}ms; analyzing directly")
+    return _analyze_uncached([text])[0]
+
+def analyze_texts(texts: List[str]) -> List[Dict[str, Any]]:
+    """Analyze many complaints, classifying the cache misses in one batch"""
+    version = _current_version()
+    
+    results: List[Any] = [None] * len(texts)
+    if result_cache is not None:
+        for i, text in enumerate(texts):
+            results[i] = result_cache.get(text, version)
+    
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = _analyze_uncached([texts[i] for i in missing])
+        for i, result in zip(missing, computed):
+            if result_cache is not None:
+                result_cache.set(texts[i], version, result)
+            results[i] = result
+    
+    return results
+
+def format_analysis(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Response shape of /api/analyze/complaint for one analysis result"""
+    return {
+        'category': result['category'],
+        'priority': result['priority'],
+        'sentiment': result['sentiment'],
+        'analysis': {
+            'confidence': result['confidence'],
+            'keywords': result['keywords'],
+            'urgency_score': result['urgency_score']
+        }
+    }
+
+# Longest NDJSON record accepted by the streaming endpoints
+MAX_STREAM_LINE_BYTES = int(os.environ.get('AI_STREAM_MAX_LINE_BYTES', 64 * 1024))
+
+class NdjsonStream:
+    """Incremental analysis of a newline-delimited JSON upload.
+    
+    Each input line is either a JSON string or an object with a ``text`` and
+    an optional ``id``. Body chunks are fed in as they arrive and split into
+    lines; a line longer than ``max_line_bytes`` is dropped as it streams in
+    and answered with an error record, so no single line is buffered beyond
+    the limit. Once feed() reports ``chunk_size`` parsed records, flush()
+    analyzes them and returns their NDJSON result lines, in input order.
+    
+    Bulk uploads are analyzed without the result cache: their texts are
+    rarely repeated, and caching them would only evict the entries that
+    interactive requests reuse.
+    """
+    
+    def __init__(self, chunk_size: int = 256, max_line_bytes: int = MAX_STREAM_LINE_BYTES):
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        # (index, id, text, error) for the records not analyzed yet
+        self._records: List[tuple] = []
+        self._line = bytearray()
+        self._line_too_long = False
+        self._index = -1
+    
+    def feed(self, data: bytes) -> bool:
+        """Take the next piece of the body; True once a chunk of records is ready to flush"""
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end < 0:
+                break
+            self._append(data[start:end])
+            self._end_line()
+            start = end + 1
+        self._append(data[start:])
+        return len(self._records) >= self.chunk_size
+    
+    def close(self) -> None:
+        """Mark the end of the body, completing a last line without a newline"""
+        self._end_line()
+    
+    def flush(self) -> str:
+        """Analyze the pending records; their NDJSON result lines, or '' if none"""
+        records, self._records = self._records, []
+        if not records:
+            return ''
+        
+        results = iter(_analyze_uncached([text for _, _, text, error in records if error is None]))
+        lines = []
+        for index, record_id, _, error in records:
+            record = {'index': index}
+            if record_id is not None:
+                record['id'] = record_id
+            if error is None:
+                record.update(format_analysis(next(results)))
+            else:
+                record['error'] = error
+            lines.append(json.dumps(record) + '\n')
+        return ''.join(lines)
+    
+    def _append(self, data: bytes) -> None:
+        if self._line_too_long:
+            return
+        self._line += data
+        if len(self._line) > self.max_line_bytes:
+            self._line_too_long = True
+            self._line = bytearray()
+    
+    def _end_line(self) -> None:
+        line, too_long = bytes(self._line), self._line_too_long
+        self._line = bytearray()
+        self._line_too_long = False
+        
+        if too_long:
+            self._index += 1
+            self._records.append((self._index, None, None, 'Line too long'))
+            return
+        if not line.strip():
+            return
+        self._index += 1
+        
+        try:
+            record = json.loads(line)
+        except ValueError:
+            self._records.append((self._index, None, None, 'Invalid JSON'))
+            return
+        
+        record_id = None
+        if isinstance(record, dict):
+            record_id = record.get('id')
+            record = record.get('text')
+        
+        if isinstance(record, str) and record:
+            self._records.append((self._index, record_id, record, None))
+        else:
+            self._records.append((self._index, record_id, None, 'Text is required'))
+
+def iter_ndjson_analysis(chunks: Iterable[bytes], chunk_size: int = 256) -> Iterator[str]:
+    """Analyze an NDJSON body given as byte chunks, yielding NDJSON results.
+    
+    At most one chunk of records and one line are held in memory however
+    long the input is; see NdjsonStream for the record format.
+    """
+    stream = NdjsonStream(chunk_size)
+    for data in chunks:
+        if stream.feed(data):
+            yield stream.flush()
+    stream.close()
+    
+    output = stream.flush()
+    if output:
+        yield output
+
+# Summaries over at least this many texts are spread across a process pool
+PARALLEL_MIN_TEXTS = int(os.environ.get('AI_PARALLEL_MIN_TEXTS', 1000))
+# Every serving worker may own such a pool, so it is kept small and shut
+# down after this many seconds without a summary
+PARALLEL_WORKERS = int(os.environ.get('AI_PARALLEL_WORKERS', min(4, os.cpu_count() or 1)))
+PARALLEL_IDLE_SECONDS = float(os.environ.get('AI_PARALLEL_IDLE_SECONDS', 60))
+
+_bulk_analyzer: Optional['BulkAnalyzer'] = None
+_bulk_jobs = 0
+_bulk_idle_timer: Optional[threading.Timer] = None
+_bulk_lock = threading.Lock()
+
+def sentiment_summary(texts: List[str]) -> Dict[str, Any]:
+    """Sentiment distribution and averages over many texts"""
+    global _bulk_analyzer, _bulk_jobs
+    
+    if len(texts) < PARALLEL_MIN_TEXTS:
+        return registry.get_sentiment_analyzer().get_sentiment_summary(texts)
+    
+    with _bulk_lock:
+        if _bulk_idle_timer is not None:
+            _bulk_idle_timer.cancel()
+        if _bulk_analyzer is None:
+            # Imported on first use, as is the sentiment engine it pulls in
+            from app.models.parallel import BulkAnalyzer
+            _bulk_analyzer = BulkAnalyzer(PARALLEL_WORKERS)
+        bulk_analyzer = _bulk_analyzer
+        _bulk_jobs += 1
+    
+    try:
+        return bulk_analyzer.sentiment_summary(texts)
+    finally:
+        with _bulk_lock:
+            _bulk_jobs -= 1
+            if _bulk_jobs == 0:
+                _schedule_bulk_shutdown()
+
+def _schedule_bulk_shutdown() -> None:
+    global _bulk_idle_timer
+    _bulk_idle_timer = threading.Timer(PARALLEL_IDLE_SECONDS, _shutdown_idle_bulk_analyzer)
+    _bulk_idle_timer.daemon = True
+    _bulk_idle_timer.start()
+
+def _shutdown_idle_bulk_analyzer() -> None:
+    global _bulk_analyzer
+    with _bulk_lock:
+        if _bulk_jobs or _bulk_analyzer is None:
+            return
+        bulk_analyzer, _bulk_analyzer = _bulk_analyzer, None
+    bulk_analyzer.close()
+
+def cache_stats() -> Dict[str, Any]:
+    """Result cache counters, or a disabled marker"""
+    if result_cache is None:
+        return {'enabled': False}
+    return {'enabled': True, **result_cache.stats()}
+
+def batching_stats() -> Dict[str, Any]:
+    """Micro-batcher counters, or a disabled marker"""
+    if micro_batcher is None:
+        return {'enabled': False}
+    return {'enabled': True, **micro_batcher.stats()}
+
+def _cache_lookups() -> Dict[tuple, float]:
+    if result_cache is None:
+        return {}
+    return {('hit',): result_cache.hits, ('miss',): result_cache.misses}
+
+def _cache_hit_ratio() -> Dict[tuple, float]:
+    if result_cache is None:
+        return {}
+    total = result_cache.hits + result_cache.misses
+    return {(): result_cache.hits / total if total else 0.0}
+
+# Read from the cache's own counters at scrape time, so lookups pay nothing extra
+metrics.counter('ai_cache_lookups_total', 'Analysis result cache lookups, by result',
+                ('result',), callback=_cache_lookups)
+metrics.gauge('ai_cache_hit_ratio', 'Share of analysis result cache lookups that hit',
+              callback=_cache_hit_ratio)
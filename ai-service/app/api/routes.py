@@ -1,16 +1,31 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.chatbot.rasa_connector import RasaConnector
 from app.chatbot.dialogflow_connector import DialogflowConnector
-from app.models.classifier import ComplaintClassifier
-from app.models.sentiment import SentimentAnalyzer
+from app.api.analysis import (
+    analyze_text, analyze_texts, batching_stats, cache_stats, format_analysis,
+    iter_ndjson_analysis, sentiment_summary
+)
+from app.chatbot.sessions import conversation_store
+from app.models.incremental import incremental_analyzer
+from app.models.registry import registry
+from app.models.training import online_learner, retrain_manager
+from app.utils.conversation import conversation_extractor
 
 api_bp = Blueprint('api', __name__)
 
-# Initialize connectors and models
+# Upper bound on texts accepted by /analyze/batch in a single request
+MAX_BATCH_SIZE = 1000
+
+# Records analyzed together by /analyze/stream, and bytes read from its body at a time
+STREAM_CHUNK_SIZE = 256
+STREAM_READ_SIZE = 64 * 1024
+
+# Upper bound on labeled samples accepted by /models/update in a single request
+MAX_UPDATE_SIZE = 500
+
+# Initialize connectors; models are shared through the registry
 rasa_connector = RasaConnector()
 dialogflow_connector = DialogflowConnector()
-classifier = ComplaintClassifier()
-sentiment_analyzer = SentimentAnalyzer()
 
 @api_bp.route('/chatbot/message', methods=['POST'])
 def chatbot_message():
@@ -18,7 +33,8 @@ def chatbot_message():
     try:
         data = request.get_json()
         message = data.get('message', '')
-        session_id = data.get('session_id', 'default')
+        # A fresh id per new conversation, so separate users never share state
+        session_id = data.get('session_id') or conversation_store.new_session_id()
         
         if not message:
             return jsonify({'error': 'Message is required'}), 400
@@ -26,14 +42,33 @@ def chatbot_message():
         # Use Rasa for chatbot response
         response = rasa_connector.get_response(message, session_id)
         
+        # The session's analysis is updated from this message alone
+        conversation_store.append_turn(session_id, 'User', message)
+        session = conversation_store.append_turn(session_id, 'Bot', response)
+        
         return jsonify({
             'response': response,
-            'session_id': session_id
+            'session_id': session_id,
+            'analysis': session['analysis']
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/chatbot/session/<session_id>', methods=['GET'])
+def get_chat_session(session_id):
+    """Stored turns, extracted data and running analysis of a chat session"""
+    session = conversation_store.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session'}), 404
+    return jsonify({key: value for key, value in session.items() if key != 'analysis_state'}), 200
+
+@api_bp.route('/chatbot/session/<session_id>', methods=['DELETE'])
+def delete_chat_session(session_id):
+    """Forget a chat session"""
+    conversation_store.delete(session_id)
+    return jsonify({'session_id': session_id, 'deleted': True}), 200
+
 @api_bp.route('/analyze/complaint', methods=['POST'])
 def analyze_complaint():
     """Analyze complaint text for category, priority, and sentiment"""
@@ -45,27 +80,119 @@ def analyze_complaint():
             return jsonify({'error': 'Text is required'}), 400
         
         # Perform analysis
-        category = classifier.classify(text)
-        priority = classifier.get_priority(text)
-        sentiment = sentiment_analyzer.analyze(text)
+        result = analyze_text(text)
+        
+        return jsonify(format_analysis(result)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze a list of complaint texts in one call, preserving input order"""
+    try:
+        data = request.get_json()
+        texts = data.get('texts', [])
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'A non-empty list of texts is required'}), 400
+        
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} texts are allowed per batch'}), 400
+        
+        if not all(isinstance(text, str) and text for text in texts):
+            return jsonify({'error': 'Every entry in texts must be a non-empty string'}), 400
+        
+        # Cached results are reused; the rest are classified as one vectorized batch
+        results = [format_analysis(result) for result in analyze_texts(texts)]
+        
+        return jsonify({
+            'results': results,
+            'count': len(results)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analyze/incremental', methods=['POST'])
+def analyze_incremental():
+    """Add one message to a client-held conversation state and analyze the result.
+    
+    The state returned by the previous call is sent back with the next
+    message; each call only processes the new message. The classification
+    matches /analyze/complaint on the joined messages, but sentiment pools
+    per-message assessments and can differ from it, hence ``method``.
+    """
+    try:
+        data = request.get_json()
+        message = data.get('message', '')
+        state = data.get('state')
+        
+        if not isinstance(message, str) or not message:
+            return jsonify({'error': 'Message is required'}), 400
+        
+        if state is not None:
+            try:
+                incremental_analyzer.validate_state(state)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid state: {e}'}), 400
+        
+        state, result = incremental_analyzer.update(state, message)
         
         return jsonify({
-            'category': category,
-            'priority': priority,
-            'sentiment': sentiment,
-            'analysis': {
-                'confidence': classifier.get_confidence(),
-                'keywords': classifier.extract_keywords(text),
-                'urgency_score': classifier.get_urgency_score(text)
-            }
+            'state': state,
+            'analysis': format_analysis(result),
+            'method': 'incremental'
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Analyze an NDJSON upload of any size, streaming NDJSON results back.
+    
+    The body is read in fixed-size pieces and processed in chunks of records,
+    so memory stays bounded regardless of how many records are sent or how
+    long a line is.
+    """
+    body = iter(lambda: request.stream.read(STREAM_READ_SIZE), b'')
+    return Response(
+        stream_with_context(iter_ndjson_analysis(body, STREAM_CHUNK_SIZE)),
+        mimetype='application/x-ndjson'
+    )
+
+@api_bp.route('/analyze/sentiment-summary', methods=['POST'])
+def analyze_sentiment_summary():
+    """Sentiment distribution and averages over a list of texts"""
+    try:
+        data = request.get_json()
+        texts = data.get('texts', [])
+        
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'A non-empty list of texts is required'}), 400
+        
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Every entry in texts must be a string'}), 400
+        
+        return jsonify(sentiment_summary(texts)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss counters of the analysis result cache"""
+    return jsonify(cache_stats()), 200
+
+@api_bp.route('/batching/stats', methods=['GET'])
+def get_batching_stats():
+    """Queue depth and batch size counters of the micro-batcher"""
+    return jsonify(batching_stats()), 200
+
 @api_bp.route('/models/retrain', methods=['POST'])
 def retrain_models():
-    """Retrain AI models with new data"""
+    """Start retraining AI models with new data in the background"""
     try:
         data = request.get_json()
         training_data = data.get('training_data', [])
@@ -73,13 +200,90 @@ def retrain_models():
         if not training_data:
             return jsonify({'error': 'Training data is required'}), 400
         
-        # Retrain classifier
-        result = classifier.retrain(training_data)
+        required_fields = ('text', 'category', 'priority')
+        if not all(isinstance(item, dict) and all(item.get(key) for key in required_fields)
+                   for item in training_data):
+            return jsonify({'error': 'Each training item needs text, category and priority'}), 400
+        
+        # Train in a background process; the live model keeps serving meanwhile
+        job_id = retrain_manager.submit(training_data)
+        
+        return jsonify({
+            'status': 'accepted',
+            'message': 'Model retraining started',
+            'job_id': job_id,
+            'status_url': f'/api/models/retrain/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/retrain/<job_id>', methods=['GET'])
+def retrain_status(job_id):
+    """Report the status of a retrain job"""
+    job = retrain_manager.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown retrain job'}), 404
+    
+    return jsonify(job), 200
+
+@api_bp.route('/models/update', methods=['POST'])
+def update_models():
+    """Incrementally fold a small batch of labeled complaints into the live models"""
+    try:
+        data = request.get_json()
+        samples = data.get('samples', [])
+        
+        if not samples:
+            return jsonify({'error': 'Samples are required'}), 400
+        
+        if len(samples) > MAX_UPDATE_SIZE:
+            return jsonify({'error': f'At most {MAX_UPDATE_SIZE} samples are allowed per update; use /models/retrain for larger sets'}), 400
+        
+        required_fields = ('text', 'category', 'priority')
+        if not all(isinstance(item, dict) and all(item.get(key) for key in required_fields)
+                   for item in samples):
+            return jsonify({'error': 'Each sample needs text, category and priority'}), 400
+        
+        try:
+            result = online_learner.update(samples)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/versions', methods=['GET'])
+def list_model_versions():
+    """List stored model versions with their manifests"""
+    try:
+        classifier = registry.get_classifier()
+        
+        return jsonify({
+            'current': classifier.store.current_version(),
+            'live': classifier.model_version(),
+            'versions': classifier.store.list_versions()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/models/rollback', methods=['POST'])
+def rollback_models():
+    """Switch the live models to a stored version (the previous one by default)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            classifier = registry.rollback(data.get('version'))
+        except (ValueError, FileNotFoundError) as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'status': 'success',
-            'message': 'Models retrained successfully',
-            'accuracy': result.get('accuracy', 0)
+            'version': classifier.version
         }), 200
         
     except Exception as e:
@@ -91,19 +295,29 @@ def extract_complaint_data():
     try:
         data = request.get_json()
         conversation = data.get('conversation', '')
+        session_id = data.get('session_id')
         analysis = data.get('analysis', {})
         user_info = data.get('user_info', {})
         
-        if not conversation:
-            return jsonify({'error': 'Conversation text is required'}), 400
+        if conversation:
+            # Extract structured data from conversation in one scan
+            extracted = conversation_extractor.extract(conversation)
+        elif session_id:
+            # Use what the session store already extracted turn by turn
+            session = conversation_store.get(session_id)
+            if session is None:
+                return jsonify({'error': 'Unknown or expired session'}), 404
+            extracted = conversation_store.extracted(session)
+            analysis = analysis or session['analysis'] or {}
+        else:
+            return jsonify({'error': 'Conversation text or session_id is required'}), 400
         
-        # Extract structured data from conversation
         extracted_data = {
-            'title': _generate_complaint_title(conversation, analysis),
-            'description': _format_complaint_description(conversation, user_info),
-            'tags': _extract_tags(conversation, analysis),
-            'entities': _extract_entities(conversation),
-            'actions': _suggest_actions(conversation, analysis),
+            'title': _generate_complaint_title(extracted, analysis),
+            'description': _format_complaint_description(extracted, user_info),
+            'tags': _extract_tags(extracted, analysis),
+            'entities': extracted.entities,
+            'actions': _suggest_actions(extracted, analysis),
             'estimatedTime': _estimate_resolution_time(analysis)
         }
         
@@ -112,30 +326,26 @@ def extract_complaint_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def _generate_complaint_title(conversation, analysis):
+def _generate_complaint_title(extracted, analysis):
     """Generate a concise title for the complaint"""
     category = analysis.get('category', 'General')
     # Simple title generation - can be enhanced with NLP
-    lines = conversation.split('\n')
-    user_lines = [line for line in lines if line.startswith('User:')]
-    
-    if user_lines:
-        first_user_message = user_lines[0].replace('User:', '').strip()
+    if extracted.first_user_message is not None:
         # Truncate to first sentence or 50 characters
-        title = first_user_message.split('.')[0][:50]
+        title = extracted.first_user_message.split('.')[0][:50]
         return f"{category}: {title}..."
     
     return f"{category} - Complaint from Chat"
 
-def _format_complaint_description(conversation, user_info):
+def _format_complaint_description(extracted, user_info):
     """Format conversation into complaint description"""
     description = f"Complaint auto-generated from chat conversation.\n\n"
     description += f"User: {user_info.get('name', 'Unknown')} ({user_info.get('email', 'Unknown')})\n\n"
     description += "Conversation:\n"
-    description += conversation.replace('User:', '\n**User:**').replace('Bot:', '\n**Assistant:**')
+    description += extracted.transcript
     return description
 
-def _extract_tags(conversation, analysis):
+def _extract_tags(extracted, analysis):
     """Extract relevant tags from conversation"""
     tags = ['auto-generated', 'chat-based']
     
@@ -146,39 +356,11 @@ def _extract_tags(conversation, analysis):
         tags.append(f"priority-{analysis['priority']}")
     
     # Add common keywords as tags
-    keywords = ['billing', 'technical', 'service', 'account', 'payment', 'bug', 'error']
-    conversation_lower = conversation.lower()
-    
-    for keyword in keywords:
-        if keyword in conversation_lower:
-            tags.append(keyword)
-    
-    return list(set(tags))  # Remove duplicates
-
-def _extract_entities(conversation):
-    """Extract entities like emails, phone numbers, order IDs"""
-    import re
-    
-    entities = {}
-    
-    # Extract email addresses
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', conversation)
-    if emails:
-        entities['emails'] = emails
-    
-    # Extract phone numbers (simple pattern)
-    phones = re.findall(r'\b\d{3}-\d{3}-\d{4}\b|\b\(\d{3}\)\s*\d{3}-\d{4}\b', conversation)
-    if phones:
-        entities['phones'] = phones
-    
-    # Extract order/ticket IDs (pattern: letters followed by numbers)
-    order_ids = re.findall(r'\b[A-Z]{2,}\d{4,}\b', conversation)
-    if order_ids:
-        entities['order_ids'] = order_ids
+    tags.extend(extracted.keywords)
     
-    return entities
+    return list(dict.fromkeys(tags))  # Remove duplicates, keeping order
 
-def _suggest_actions(conversation, analysis):
+def _suggest_actions(extracted, analysis):
     """Suggest appropriate actions based on conversation"""
     actions = []
     
@@ -0,0 +1,184 @@
+"""Offline batch scoring of complaint dumps.
+
+Runs ComplaintClassifier and SentimentAnalyzer over CSV, Parquet or NDJSON
+files without the Flask service:
+
+    python -m app.batch score complaints.csv scored.parquet --text-column description
+
+The input is read in chunks, each chunk is scored across a process pool and
+appended to the output, so memory stays bounded by the chunk size. Rows
+without text are kept with empty score columns. Parquet files need pyarrow.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.models.parallel import BulkAnalyzer
+from app.models.registry import registry
+
+# Score columns added to every row, with types that hold up when a chunk has
+# no text at all, so every chunk of a Parquet output has the same schema
+SCORE_COLUMNS = {
+    'category': 'string',
+    'priority': 'string',
+    'confidence': 'float64',
+    'urgency_score': 'float64',
+    'keywords': 'string',
+    'sentiment': 'string',
+    'polarity': 'float64',
+    'subjectivity': 'float64',
+    'sentiment_confidence': 'float64',
+    'sentiment_urgency': 'float64',
+    'emotions': 'string',
+    'is_complaint': 'boolean'
+}
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'ndjson'
+    raise ValueError(f"Unsupported file type '{extension}'; use .csv, .parquet or .jsonl")
+
+def read_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the input file as DataFrames of at most ``chunksize`` rows"""
+    file_format = _file_format(path)
+    
+    if file_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize)
+    elif file_format == 'ndjson':
+        yield from pd.read_json(path, lines=True, chunksize=chunksize)
+    else:
+        import pyarrow.parquet as pq
+        
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+def flatten_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """One output row's score columns from an analysis result"""
+    sentiment = result['sentiment']
+    return {
+        'category': result['category'],
+        'priority': result['priority'],
+        'confidence': result['confidence'],
+        'urgency_score': result['urgency_score'],
+        'keywords': ' '.join(result['keywords']),
+        'sentiment': sentiment['sentiment'],
+        'polarity': sentiment['polarity'],
+        'subjectivity': sentiment['subjectivity'],
+        'sentiment_confidence': sentiment['confidence'],
+        'sentiment_urgency': sentiment['urgency_score'],
+        'emotions': ' '.join(sentiment['emotions']),
+        'is_complaint': sentiment['is_complaint']
+    }
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV, Parquet or NDJSON file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.file_format = _file_format(path)
+        self._parquet_writer = None
+        self._started = False
+    
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.file_format == 'csv':
+            frame.to_csv(self.path, mode='a' if self._started else 'w',
+                         header=not self._started, index=False)
+        elif self.file_format == 'ndjson':
+            with open(self.path, 'a' if self._started else 'w') as f:
+                frame.to_json(f, orient='records', lines=True)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        self._started = True
+    
+    def close(self) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def score_file(input_path: str, output_path: str, text_column: str = 'text',
+               chunksize: int = 10000, workers: Optional[int] = None) -> Dict[str, Any]:
+    """Score every row of ``input_path`` and write the results to ``output_path``"""
+    writer = ChunkWriter(output_path)
+    rows = 0
+    started = time.perf_counter()
+    
+    # Load the models (training and saving them if none are stored) once,
+    # before the pool starts: forked workers inherit them, and any other
+    # worker loads the saved version instead of training its own
+    registry.preload()
+    
+    with BulkAnalyzer(workers, load_classifier=True) as bulk_analyzer:
+        try:
+            for chunk in read_chunks(input_path, chunksize):
+                if text_column not in chunk.columns:
+                    raise ValueError(f"Column '{text_column}' not found in {input_path}")
+                
+                column = chunk[text_column]
+                has_text = column.notna() & (column.astype(str).str.strip() != '')
+                texts: List[str] = column[has_text].astype(str).tolist()
+                scores = pd.DataFrame(
+                    [flatten_result(result) for shard in bulk_analyzer.analyze(texts) for result in shard],
+                    index=chunk.index[has_text], columns=list(SCORE_COLUMNS)
+                )
+                
+                scored = pd.concat(
+                    [chunk, scores.reindex(chunk.index).astype(SCORE_COLUMNS)], axis=1
+                ).reset_index(drop=True)
+                writer.write(scored)
+                
+                rows += len(chunk)
+                elapsed = time.perf_counter() - started
+                print(f"Scored {rows} rows ({rows / elapsed:.0f} rows/sec)", file=sys.stderr)
+        finally:
+            writer.close()
+    
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else 0.0
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m app.batch', description=__doc__.splitlines()[0])
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    
+    score = subcommands.add_parser('score', help='Score a complaint dump')
+    score.add_argument('input', help='Input .csv, .parquet or .jsonl file')
+    score.add_argument('output', help='Output .csv, .parquet or .jsonl file')
+    score.add_argument('--text-column', default='text', help='Column holding the complaint text')
+    score.add_argument('--chunksize', type=int, default=10000, help='Rows read and written per chunk')
+    score.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        summary = score_file(args.input, args.output, args.text_column, args.chunksize, args.workers)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except ImportError as e:
+        print(f"Error: {e}. Reading or writing Parquet files needs pyarrow "
+              f"(pip install pyarrow)", file=sys.stderr)
+        return 1
+    
+    print(f"Done: {summary['rows']} rows in {summary['seconds']}s "
+          f"({summary['rows_per_second']} rows/sec)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
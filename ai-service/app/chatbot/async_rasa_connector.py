@@ -0,0 +1,75 @@
+import os
+import time
+from typing import Optional
+
+import httpx
+
+from app.chatbot.rasa_connector import RasaConnector
+from app.utils.metrics import CHATBOT_LATENCY
+
+class AsyncRasaConnector(RasaConnector):
+    """Non-blocking variant of RasaConnector for the ASGI app.
+    
+    Shares the configuration, circuit breaker and fallback responses of
+    RasaConnector, but talks to Rasa through a pooled ``httpx.AsyncClient`` so
+    a waiting chat turn holds no thread.
+    """
+    
+    def __init__(self, rasa_url: Optional[str] = None, **kwargs):
+        super().__init__(rasa_url, **kwargs)
+        self.max_connections = int(os.environ.get('RASA_POOL_SIZE', 20))
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            connect_timeout, read_timeout = self.timeout
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={"Content-Type": "application/json"}
+            )
+        return self._client
+    
+    async def get_response_async(self, message: str, sender_id: str = "default") -> str:
+        """Get response from Rasa chatbot without blocking the event loop"""
+        if not self.circuit_breaker.allow_request():
+            return self._get_fallback_response(message)
+        
+        try:
+            started = time.perf_counter()
+            response = await self.client.post(
+                self.webhook_url,
+                json={"sender": sender_id, "message": message}
+            )
+            CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='rasa',
+                                    outcome='ok' if response.status_code == 200 else 'error')
+            
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+            
+            if response.status_code == 200:
+                data = response.json()
+                if data and len(data) > 0:
+                    return data[0].get("text", "I'm sorry, I didn't understand that.")
+                else:
+                    return "I'm here to help you with your complaints. How can I assist you today?"
+            else:
+                return "I'm experiencing some technical difficulties. Please try again later."
+        
+        except (httpx.HTTPError, ValueError):
+            # ValueError: a 200 response whose body is not JSON, which the
+            # sync connector sees as a requests JSONDecodeError
+            self.circuit_breaker.record_failure()
+            CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='rasa', outcome='error')
+            # Fallback responses when Rasa is not available
+            return self._get_fallback_response(message)
+    
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Callable, Optional
+
+class CircuitBreaker:
+    """Stops calling a failing backend and probes it in the background.
+    
+    After ``failure_threshold`` consecutive failures the circuit opens: callers
+    are told to skip the backend (and use their fallback) without paying for a
+    connection attempt. While open, a daemon thread runs ``probe`` every
+    ``probe_interval`` seconds and closes the circuit as soon as it succeeds.
+    Without a probe, one trial request is let through after ``reset_timeout``.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 probe: Optional[Callable[[], bool]] = None, probe_interval: float = 5.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+    
+    def allow_request(self) -> bool:
+        """Whether the caller should try the backend right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            
+            if self.state == self.OPEN and self.probe is None and \
+                    time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one trial request through
+                self.state = self.HALF_OPEN
+                return True
+            
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._open()
+    
+    def _open(self) -> None:
+        """Open the circuit and start probing; caller holds the lock"""
+        if self.state != self.OPEN:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+    
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if self.state != self.OPEN:
+                    return
+            
+            try:
+                healthy = self.probe()
+            except Exception:
+                healthy = False
+            
+            if healthy:
+                self.record_success()
+                return
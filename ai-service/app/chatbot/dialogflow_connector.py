@@ -1,7 +1,18 @@
 import os
-from google.cloud import dialogflow
+import time
 from typing import Dict, Any
 
+from app.utils.metrics import CHATBOT_LATENCY
+
+def _import_dialogflow():
+    """Import the Dialogflow client library on first use.
+    
+    google-cloud-dialogflow is heavy to import and only needed when a project is
+    configured, so it is kept off the service's startup path.
+    """
+    from google.cloud import dialogflow
+    return dialogflow
+
 class DialogflowConnector:
     """Connector for Google Dialogflow integration"""
     
@@ -12,6 +23,7 @@ class DialogflowConnector:
         
         if self.project_id:
             try:
+                dialogflow = _import_dialogflow()
                 self.session_client = dialogflow.SessionsClient()
             except Exception as e:
                 print(f"Failed to initialize Dialogflow client: {e}")
@@ -22,13 +34,20 @@ class DialogflowConnector:
             return self._get_fallback_response(message)
         
         try:
+            dialogflow = _import_dialogflow()
             session = self.session_client.session_path(self.project_id, session_id)
             text_input = dialogflow.TextInput(text=message, language_code=self.language_code)
             query_input = dialogflow.QueryInput(text=text_input)
             
-            response = self.session_client.detect_intent(
-                request={"session": session, "query_input": query_input}
-            )
+            started = time.perf_counter()
+            try:
+                response = self.session_client.detect_intent(
+                    request={"session": session, "query_input": query_input}
+                )
+            except Exception:
+                CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='dialogflow', outcome='error')
+                raise
+            CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='dialogflow', outcome='ok')
             
             return response.query_result.fulfillment_text or self._get_fallback_response(message)
             
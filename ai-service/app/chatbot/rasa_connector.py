@@ -1,28 +1,69 @@
+import os
+import time
 import requests
 import json
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Optional
+
+from app.chatbot.circuit_breaker import CircuitBreaker
+from app.utils.metrics import CHATBOT_LATENCY
 
 class RasaConnector:
-    """Connector for Rasa chatbot integration"""
+    """Connector for Rasa chatbot integration.
+    
+    Requests reuse pooled keep-alive connections from one ``requests.Session``.
+    A circuit breaker answers from the fallback responses immediately while
+    Rasa is unhealthy, and probes ``/health`` in the background until it recovers.
+    """
     
-    def __init__(self, rasa_url: str = "http://localhost:5005"):
+    def __init__(self, rasa_url: Optional[str] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None):
+        rasa_url = rasa_url or os.environ.get('RASA_URL', 'http://localhost:5005')
         self.rasa_url = rasa_url
         self.webhook_url = f"{rasa_url}/webhooks/rest/webhook"
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else float(os.environ.get('RASA_CONNECT_TIMEOUT', 2)),
+            read_timeout if read_timeout is not None else float(os.environ.get('RASA_READ_TIMEOUT', 10))
+        )
+        
+        pool_size = pool_size or int(os.environ.get('RASA_POOL_SIZE', 20))
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.mount(self.rasa_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('RASA_FAILURE_THRESHOLD', 3)),
+            probe=self.check_connection,
+            probe_interval=float(os.environ.get('RASA_PROBE_INTERVAL', 5))
+        )
         
     def get_response(self, message: str, sender_id: str = "default") -> str:
         """Get response from Rasa chatbot"""
+        if not self.circuit_breaker.allow_request():
+            # Rasa is known to be down; don't make the user wait for a timeout
+            return self._get_fallback_response(message)
+        
         try:
             payload = {
                 "sender": sender_id,
                 "message": message
             }
             
-            response = requests.post(
+            started = time.perf_counter()
+            response = self.session.post(
                 self.webhook_url,
                 json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
+                timeout=self.timeout
             )
+            CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='rasa',
+                                    outcome='ok' if response.status_code == 200 else 'error')
+            
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
             
             if response.status_code == 200:
                 data = response.json()
@@ -34,6 +75,8 @@ class RasaConnector:
                 return "I'm experiencing some technical difficulties. Please try again later."
                 
         except requests.exceptions.RequestException:
+            self.circuit_breaker.record_failure()
+            CHATBOT_LATENCY.observe(time.perf_counter() - started, backend='rasa', outcome='error')
             # Fallback responses when Rasa is not available
             return self._get_fallback_response(message)
     
@@ -55,7 +98,7 @@ class RasaConnector:
     def check_connection(self) -> bool:
         """Check if Rasa server is available"""
         try:
-            response = requests.get(f"{self.rasa_url}/health", timeout=5)
+            response = self.session.get(f"{self.rasa_url}/health", timeout=(self.timeout[0], 5))
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
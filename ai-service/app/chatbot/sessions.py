@@ -0,0 +1,117 @@
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from app.models.incremental import IncrementalAnalyzer, incremental_analyzer
+from app.utils.cache import LocalCacheBackend, RedisCacheBackend
+from app.utils.conversation import ConversationExtractor, ExtractedConversation, conversation_extractor
+
+class ConversationStore:
+    """Server-side chat state, one entry per session.
+    
+    Each session keeps its recent turns, the complaint data extracted from
+    them and the IncrementalAnalyzer state of the user's messages. Every
+    appended turn updates that state from the new message alone, so neither
+    the client nor the extraction endpoint has to resend or re-parse the
+    transcript.
+    
+    Sessions live in a cache backend: the in-process LRU (bounded, with a
+    sliding time to live) or Redis when several workers share sessions.
+    Sessions longer than ``max_turns`` drop their oldest quarter of turns;
+    the extracted data is then rebuilt from what remains, while the running
+    analysis keeps covering the whole conversation.
+    
+    Turns are appended through the backend's atomic update(), so concurrent
+    messages to one session never lose each other's turns, whichever worker
+    receives them.
+    """
+    
+    def __init__(self, backend=None, max_turns: int = 200,
+                 extractor: Optional[ConversationExtractor] = None,
+                 analyzer: Optional[IncrementalAnalyzer] = None):
+        self.backend = backend if backend is not None else LocalCacheBackend(copy_values=True)
+        self.max_turns = max_turns
+        self.extractor = extractor or conversation_extractor
+        self.analyzer = analyzer or incremental_analyzer
+    
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the stored state of a session, or None"""
+        return self.backend.get(session_id)
+    
+    def delete(self, session_id: str) -> None:
+        self.backend.delete(session_id)
+    
+    def append_turn(self, session_id: str, speaker: str, text: str,
+                    prepared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record one message and return the updated session.
+        
+        ``speaker`` is 'User' or 'Bot'. User messages update the session's
+        analysis of the conversation so far; ``prepared`` is the message's
+        IncrementalAnalyzer.prepare() output when the caller already has it.
+        """
+        if speaker == 'User' and prepared is None:
+            prepared = self.analyzer.prepare(text)
+        
+        def add_turn(session: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            # May run more than once under contention on a shared backend
+            now = time.time()
+            session = session or {
+                'session_id': session_id,
+                'created_at': now,
+                'turns': [],
+                'extracted': None,
+                'analysis': None,
+                'analysis_state': None
+            }
+            
+            session['turns'].append({'speaker': speaker, 'text': text, 'at': now})
+            session['updated_at'] = now
+            
+            if len(session['turns']) > self.max_turns:
+                del session['turns'][:len(session['turns']) - self.max_turns * 3 // 4]
+                session['extracted'] = self.extractor.extract(
+                    '\n'.join(self._line(turn['speaker'], turn['text']) for turn in session['turns'])
+                ).to_dict()
+            else:
+                previous = session['extracted']
+                session['extracted'] = self.extractor.extend(
+                    ExtractedConversation.from_dict(previous) if previous else None,
+                    self._line(speaker, text)
+                ).to_dict()
+            
+            if speaker == 'User':
+                session['analysis_state'], session['analysis'] = self.analyzer.apply(
+                    session['analysis_state'], prepared
+                )
+            return session
+        
+        return self.backend.update(session_id, add_turn)
+    
+    def extracted(self, session: Dict[str, Any]) -> ExtractedConversation:
+        """Complaint data extracted from a stored session"""
+        if not session.get('extracted'):
+            return self.extractor.extract('')
+        return ExtractedConversation.from_dict(session['extracted'])
+    
+    @staticmethod
+    def _line(speaker: str, text: str) -> str:
+        return f"{speaker}: {text}"
+
+def create_conversation_store() -> ConversationStore:
+    """Build the session store from the environment"""
+    ttl = float(os.environ.get('AI_SESSION_TTL', 1800))
+    if os.environ.get('AI_SESSION_BACKEND', 'local').lower() == 'redis':
+        backend = RedisCacheBackend(
+            os.environ.get('REDIS_URL', 'redis://localhost:6379/0'), ttl, prefix='ai-service:session:'
+        )
+    else:
+        backend = LocalCacheBackend(int(os.environ.get('AI_SESSION_MAX', 10000)), ttl, copy_values=True)
+    
+    return ConversationStore(backend, int(os.environ.get('AI_SESSION_MAX_TURNS', 200)))
+
+conversation_store = create_conversation_store()
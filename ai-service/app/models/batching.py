@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into small batches.
+    
+    Callers submit one text and get a Future. A worker thread waits for the
+    first queued item, then keeps collecting until ``max_batch_size`` items
+    are queued or ``max_wait_ms`` has passed, runs them through
+    ``process_batch`` as one vectorized call, and resolves every Future with
+    its own result. Under load this trades at most ``max_wait_ms`` of extra
+    latency for far fewer per-call pipeline overheads; when traffic is light
+    a lone request is processed as soon as its wait budget runs out.
+    
+    The worker thread is started on first submit, and started again in a
+    process forked after that (gunicorn's preloaded app), since threads do
+    not survive a fork. Callers should still wait at most ``timeout``
+    seconds for a result and compute it themselves after that, so a stalled
+    or overloaded batcher delays requests instead of hanging them.
+    """
+    
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_wait_ms: float = 5.0, max_batch_size: int = 32,
+                 timeout: float = 1.0):
+        self.process_batch = process_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.total_queue_wait = 0.0
+        
+        self._start_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+    
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the Future resolves to its result"""
+        if self._pid != os.getpid():
+            self._start()
+        future: Future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size counters for monitoring"""
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_wait_ms': self.max_wait * 1000.0,
+                'max_batch_size': self.max_batch_size,
+                'batches': self.batches,
+                'items': self.items,
+                'largest_batch': self.largest_batch,
+                'average_batch_size': round(self.items / self.batches, 3) if self.batches else 0.0,
+                'average_queue_wait_ms': round(self.total_queue_wait / self.items * 1000.0, 3) if self.items else 0.0
+            }
+    
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Items queued in the parent are never processed here; start clean
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, args=(self._queue,),
+                                            name='micro-batcher', daemon=True)
+            self._worker.start()
+            self._pid = os.getpid()
+    
+    def _run(self, items: "queue.Queue[tuple]") -> None:
+        while True:
+            batch = [items.get()]
+            deadline = time.monotonic() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(items.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._process(batch)
+    
+    def _process(self, batch: List[tuple]) -> None:
+        started = time.monotonic()
+        # Skip items whose caller cancelled the Future while it was queued
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _, _ in batch]
+        
+        try:
+            results = self.process_batch(items)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            results = None
+        
+        if results is not None:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        
+        with self._stats_lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.total_queue_wait += sum(started - queued_at for _, _, queued_at in batch)
+
+def create_micro_batcher(process_batch: Callable[[List[Any]], List[Any]]) -> Optional[MicroBatcher]:
+    """Build a batcher from the environment; None unless AI_MICROBATCH_MAX_WAIT_MS is set"""
+    max_wait_ms = float(os.environ.get('AI_MICROBATCH_MAX_WAIT_MS', 0))
+    if max_wait_ms <= 0:
+        return None
+    
+    max_batch_size = int(os.environ.get('AI_MICROBATCH_MAX_SIZE', 32))
+    timeout_ms = float(os.environ.get('AI_MICROBATCH_TIMEOUT_MS', 1000))
+    return MicroBatcher(process_batch, max_wait_ms, max_batch_size, timeout_ms / 1000.0)
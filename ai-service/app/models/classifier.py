@@ -1,18 +1,109 @@
-import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
 import joblib
-import re
-from typing import List, Dict, Any
+import copy
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Sequence, Tuple, Union
+
+from app.models.linear import LinearScorer
+from app.models.store import ModelStore
+from app.utils.keyword_matcher import KeywordMatcher, KeywordMatches, load_lexicons
+from app.utils.metrics import stage
+from app.utils.text_processing import Document
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+
+@dataclass(frozen=True)
+class ClassificationResult:
+    """Immutable outcome of classifying one complaint.
+    
+    Every call returns its own result, so the confidence travels with the
+    prediction instead of living on the shared classifier instance.
+    """
+    category: str
+    priority: str
+    confidence: float = 0.0
+    keywords: Tuple[str, ...] = field(default_factory=tuple)
+    urgency_score: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict representation for JSON responses"""
+        return {
+            'category': self.category,
+            'priority': self.priority,
+            'confidence': self.confidence,
+            'keywords': list(self.keywords),
+            'urgency_score': self.urgency_score
+        }
+
+def build_pipelines() -> Tuple['Pipeline', 'Pipeline']:
+    """Fresh, unfitted category and priority pipelines"""
+    # scikit-learn is imported when models are first built or loaded, so
+    # the service can start without it (AI_FAST_START)
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    
+    category_model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
+        ('classifier', MultinomialNB())
+    ])
+    
+    priority_model = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=3000, stop_words='english')),
+        ('classifier', MultinomialNB())
+    ])
+    
+    return category_model, priority_model
+
+def fit_models(training_data: List[Dict[str, Any]]) -> Tuple['Pipeline', 'Pipeline', Dict[str, Any]]:
+    """Fit new category and priority pipelines and score them on a held-out split.
+    
+    Never touches a live classifier, so it can run in a background process.
+    """
+    # Training-only dependencies are imported on first use to keep worker startup fast
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+    
+    texts = [item['text'] for item in training_data]
+    categories = [item['category'] for item in training_data]
+    priorities = [item['priority'] for item in training_data]
+    
+    # Split data for validation
+    X_train, X_test, y_cat_train, y_cat_test = train_test_split(
+        texts, categories, test_size=0.2, random_state=42
+    )
+    
+    _, _, y_pri_train, y_pri_test = train_test_split(
+        texts, priorities, test_size=0.2, random_state=42
+    )
+    
+    # Train models
+    category_model, priority_model = build_pipelines()
+    category_model.fit(X_train, y_cat_train)
+    priority_model.fit(X_train, y_pri_train)
+    
+    # Calculate accuracy
+    cat_predictions = category_model.predict(X_test)
+    pri_predictions = priority_model.predict(X_test)
+    
+    metrics = {
+        'category_accuracy': float(accuracy_score(y_cat_test, cat_predictions)),
+        'priority_accuracy': float(accuracy_score(y_pri_test, pri_predictions)),
+        'training_samples': len(training_data)
+    }
+    
+    return category_model, priority_model, metrics
 
 class ComplaintClassifier:
     """AI model for classifying complaints into categories and determining priority"""
     
-    def __init__(self):
+    def __init__(self, category_model: Optional['Pipeline'] = None,
+                 priority_model: Optional['Pipeline'] = None,
+                 version: Optional[str] = None):
         self.categories = [
             'Technical Support',
             'Billing',
@@ -26,19 +117,38 @@ class ComplaintClassifier:
         
         self.priority_levels = ['Low', 'Medium', 'High', 'Critical']
         
-        # Initialize models
-        self.category_model = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=5000, stop_words='english')),
-            ('classifier', MultinomialNB())
-        ])
+        # Rule lexicons (app/models/lexicons.json), matched in one scan per text
+        lexicons = load_lexicons()['classifier']
+        self.urgency_keywords = {
+            keyword.lower(): weight for keyword, weight in lexicons['urgency_weights'].items()
+        }
+        self.priority_keywords = lexicons['priority_rules']
+        self.keyword_matcher = KeywordMatcher({
+            'urgency': self.urgency_keywords,
+            **{f'priority:{level}': keywords for level, keywords in self.priority_keywords.items()}
+        })
         
-        self.priority_model = Pipeline([
-            ('tfidf', TfidfVectorizer(max_features=3000, stop_words='english')),
-            ('classifier', MultinomialNB())
-        ])
+        # Initialize models
+        self.category_model, self.priority_model = build_pipelines()
         
-        self.confidence_score = 0.0
+        # Confidence of the last classify() call, kept per thread so that
+        # concurrent requests never read each other's value
+        self._local = threading.local()
         self.is_trained = False
+        self.store = ModelStore()
+        self.version = version
+        # Incremental updates applied since the last saved version
+        self.pending_updates = 0
+        # (category_model, priority_model, scorer) of the last linear_scorer() export
+        self._scorer_cache: Optional[tuple] = None
+        self.use_linear_scorer = os.environ.get('AI_LINEAR_SCORER', 'True').lower() == 'true'
+        
+        if category_model is not None and priority_model is not None:
+            # Already-fitted pipelines, e.g. produced by a background retrain
+            self.category_model = category_model
+            self.priority_model = priority_model
+            self.is_trained = True
+            return
         
         # Load pre-trained models if available
         self._load_models()
@@ -50,19 +160,27 @@ class ComplaintClassifier:
     def _load_models(self):
         """Load pre-trained models from disk"""
         try:
-            self.category_model = joblib.load('models/category_model.pkl')
-            self.priority_model = joblib.load('models/priority_model.pkl')
+            self.category_model, self.priority_model, self.version = self.store.load()
             self.is_trained = True
+            print(f"Loaded pre-trained models successfully (version {self.version})")
+            return
+        except FileNotFoundError:
+            pass
+        
+        # Unversioned models written by older releases
+        try:
+            self.category_model = joblib.load(os.path.join(self.store.root, 'category_model.pkl'))
+            self.priority_model = joblib.load(os.path.join(self.store.root, 'priority_model.pkl'))
+            self.is_trained = True
+            self.version = 'legacy'
             print("Loaded pre-trained models successfully")
         except FileNotFoundError:
             print("No pre-trained models found, will train with sample data")
     
-    def _save_models(self):
-        """Save trained models to disk"""
-        import os
-        os.makedirs('models', exist_ok=True)
-        joblib.dump(self.category_model, 'models/category_model.pkl')
-        joblib.dump(self.priority_model, 'models/priority_model.pkl')
+    def _save_models(self, metrics: Optional[Dict[str, Any]] = None):
+        """Save trained models to disk as a new version"""
+        self.version = self.store.save(self.category_model, self.priority_model, metrics)
+        self.pending_updates = 0
     
     def _train_with_sample_data(self):
         """Train models with sample complaint data"""
@@ -97,7 +215,7 @@ class ComplaintClassifier:
         self.priority_model.fit(texts, priorities)
         
         self.is_trained = True
-        self._save_models()
+        self._save_models({'source': 'sample_data', 'training_samples': len(sample_data)})
         print("Models trained with sample data")
     
     def classify(self, text: str) -> str:
@@ -107,17 +225,122 @@ class ComplaintClassifier:
         
         try:
             cleaned_text = self._preprocess_text(text)
-            prediction = self.category_model.predict([cleaned_text])[0]
+            probabilities, classes = self._predict_proba('category', [cleaned_text])
             
-            # Get prediction probabilities for confidence
-            probabilities = self.category_model.predict_proba([cleaned_text])[0]
-            self.confidence_score = max(probabilities)
+            # The most probable class is the prediction, its probability the confidence
+            best = probabilities[0].argmax()
+            self._local.confidence_score = probabilities[0, best]
             
-            return prediction
+            return classes[best]
         except Exception as e:
             print(f"Classification error: {e}")
             return "General Inquiry"
     
+    def analyze(self, text: Union[str, Document]) -> ClassificationResult:
+        """Classify a complaint in a single pass: category, priority, confidence and keywords"""
+        return self.analyze_batch([text])[0]
+    
+    def analyze_batch(self, texts: Sequence[Union[str, Document]]) -> List[ClassificationResult]:
+        """Single-pass analysis of many complaints.
+        
+        Each text is preprocessed once and each model's vectorizer runs once
+        over the whole batch; labels are taken as the argmax of the
+        probabilities instead of calling predict() and predict_proba() separately.
+        Documents already built for the sentiment analyzer are reused as is.
+        """
+        if not texts:
+            return []
+        
+        with stage('preprocess'):
+            documents = [Document.of(text) for text in texts]
+            texts = [document.text for document in documents]
+            cleaned_texts = [document.alpha_text for document in documents]
+        with stage('keywords'):
+            keywords = [self._keywords_from_cleaned(cleaned_text) for cleaned_text in cleaned_texts]
+            matches = [self.keyword_matcher.find(document.lower) for document in documents]
+            urgency_scores = [self.get_urgency_score(text, text_matches) for text, text_matches in zip(texts, matches)]
+        
+        categories = ["General Inquiry"] * len(texts)
+        confidences = [0.0] * len(texts)
+        priorities = None
+        
+        if self.is_trained:
+            try:
+                scorer = self.linear_scorer()
+                if scorer is not None:
+                    with stage('category_vectorize'):
+                        # Shared by both models
+                        counts = scorer.vectorize(cleaned_texts)
+                    with stage('category_predict'):
+                        category_probabilities = scorer.category.predict_proba(counts)
+                    with stage('priority_predict'):
+                        priority_probabilities = scorer.priority.predict_proba(counts)
+                else:
+                    # Same as category_model.predict_proba, split so both halves are timed
+                    with stage('category_vectorize'):
+                        features = self.category_model[:-1].transform(cleaned_texts)
+                    with stage('category_predict'):
+                        category_probabilities = self.category_model[-1].predict_proba(features)
+                    with stage('priority_predict'):
+                        priority_probabilities = self.priority_model.predict_proba(cleaned_texts)
+                
+                category_index = category_probabilities.argmax(axis=1)
+                category_classes = self.category_model.classes_
+                categories = [str(category_classes[index]) for index in category_index]
+                confidences = [
+                    float(category_probabilities[row, index])
+                    for row, index in enumerate(category_index)
+                ]
+                
+                priority_classes = self.priority_model.classes_
+                priorities = [
+                    str(priority_classes[index])
+                    for index in priority_probabilities.argmax(axis=1)
+                ]
+            except Exception as e:
+                print(f"Analysis error: {e}")
+                categories = ["General Inquiry"] * len(texts)
+                confidences = [0.0] * len(texts)
+                priorities = None
+        
+        if priorities is None:
+            priorities = [self._rule_based_priority(text, text_matches) for text, text_matches in zip(texts, matches)]
+        
+        return [
+            ClassificationResult(
+                category=categories[i],
+                priority=priorities[i],
+                confidence=confidences[i],
+                keywords=tuple(keywords[i]),
+                urgency_score=urgency_scores[i]
+            )
+            for i in range(len(texts))
+        ]
+    
+    def classify_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Classify many complaints with a single vectorizer transform"""
+        if not self.is_trained:
+            return [{'category': "General Inquiry", 'confidence': 0.0} for _ in texts]
+        
+        if not texts:
+            return []
+        
+        try:
+            cleaned_texts = [self._preprocess_text(text) for text in texts]
+            
+            # One vectorization and one product for the whole batch; the
+            # label is the argmax of the probabilities, same as predict()
+            probabilities, classes = self._predict_proba('category', cleaned_texts)
+            best = probabilities.argmax(axis=1)
+            
+            return [
+                {'category': str(classes[index]), 'confidence': float(probabilities[row, index])}
+                for row, index in enumerate(best)
+            ]
+        except Exception as e:
+            print(f"Batch classification error: {e}")
+            return [{'category': "General Inquiry", 'confidence': 0.0} for _ in texts]
+    
     def get_priority(self, text: str) -> str:
         """Determine priority level of complaint"""
         if not self.is_trained:
@@ -125,119 +348,170 @@ class ComplaintClassifier:
         
         try:
             cleaned_text = self._preprocess_text(text)
-            prediction = self.priority_model.predict([cleaned_text])[0]
-            return prediction
+            probabilities, classes = self._predict_proba('priority', [cleaned_text])
+            return classes[probabilities[0].argmax()]
         except Exception as e:
             print(f"Priority prediction error: {e}")
             return self._rule_based_priority(text)
     
-    def _rule_based_priority(self, text: str) -> str:
-        """Rule-based priority assignment when ML model is unavailable"""
-        text_lower = text.lower()
+    def get_priority_batch(self, texts: List[str]) -> List[str]:
+        """Determine priority levels for many complaints in one pass"""
+        if not self.is_trained:
+            return [self._rule_based_priority(text) for text in texts]
         
-        # Critical keywords
-        if any(word in text_lower for word in ['urgent', 'emergency', 'critical', 'down', 'not working', 'broken']):
-            return 'Critical'
+        if not texts:
+            return []
         
-        # High priority keywords
-        elif any(word in text_lower for word in ['billing', 'charged', 'payment', 'money', 'damaged', 'wrong']):
-            return 'High'
+        try:
+            cleaned_texts = [self._preprocess_text(text) for text in texts]
+            probabilities, classes = self._predict_proba('priority', cleaned_texts)
+            return [str(classes[index]) for index in probabilities.argmax(axis=1)]
+        except Exception as e:
+            print(f"Batch priority prediction error: {e}")
+            return [self._rule_based_priority(text) for text in texts]
+    
+    def linear_scorer(self) -> Optional[LinearScorer]:
+        """Lean scorer exported from the current pipelines, or None to use the pipelines.
+        
+        Exported on first use and again whenever the pipelines are replaced;
+        None when AI_LINEAR_SCORER is false, the models are untrained or the
+        pipelines cannot be exported.
+        """
+        if not self.use_linear_scorer or not self.is_trained:
+            return None
+        
+        category_model, priority_model = self.category_model, self.priority_model
+        cached = self._scorer_cache
+        if cached is None or cached[0] is not category_model or cached[1] is not priority_model:
+            try:
+                scorer = LinearScorer.from_pipelines(category_model, priority_model)
+            except ValueError as e:
+                print(f"Linear scorer unavailable, using the sklearn pipelines: {e}")
+                scorer = None
+            cached = self._scorer_cache = (category_model, priority_model, scorer)
+        return cached[2]
+    
+    def _predict_proba(self, model: str, cleaned_texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Probabilities and classes of the 'category' or 'priority' model"""
+        scorer = self.linear_scorer()
+        if scorer is not None:
+            linear_model = getattr(scorer, model)
+            return linear_model.predict_proba(scorer.vectorize(cleaned_texts)), linear_model.classes_
+        
+        pipeline = self.category_model if model == 'category' else self.priority_model
+        return pipeline.predict_proba(cleaned_texts), pipeline.classes_
+    
+    def _rule_based_priority(self, text: str, matches: Optional[KeywordMatches] = None) -> str:
+        """Rule-based priority assignment when ML model is unavailable"""
+        if matches is None:
+            matches = self.keyword_matcher.find(text.lower())
         
-        # Medium priority keywords
-        elif any(word in text_lower for word in ['slow', 'late', 'delay', 'issue', 'problem']):
-            return 'Medium'
+        # First level, from Critical down, with a keyword in the text
+        for level in self.priority_keywords:
+            if matches.contains(f'priority:{level}'):
+                return level
         
         # Default to Low
-        else:
-            return 'Low'
+        return 'Low'
     
     def get_confidence(self) -> float:
-        """Get confidence score of last classification"""
-        return float(self.confidence_score)
+        """Get confidence score of the calling thread's last classify() call.
+        
+        Prefer analyze(), whose result carries its own confidence.
+        """
+        return float(getattr(self._local, 'confidence_score', 0.0))
     
     def extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from complaint text"""
+        return self._keywords_from_cleaned(self._preprocess_text(text))
+    
+    def _keywords_from_cleaned(self, cleaned_text: str) -> List[str]:
+        """Keyword extraction on text that has already been preprocessed"""
         # Simple keyword extraction
-        cleaned_text = self._preprocess_text(text)
         words = cleaned_text.split()
         
         # Filter out common words and keep meaningful ones
         meaningful_words = [word for word in words if len(word) > 3]
         return meaningful_words[:10]  # Return top 10 keywords
     
-    def get_urgency_score(self, text: str) -> float:
+    def get_urgency_score(self, text: str, matches: Optional[KeywordMatches] = None) -> float:
         """Calculate urgency score (0-1) based on text content"""
-        text_lower = text.lower()
-        urgency_keywords = {
-            'urgent': 0.9,
-            'emergency': 1.0,
-            'critical': 0.9,
-            'immediately': 0.8,
-            'asap': 0.8,
-            'broken': 0.7,
-            'not working': 0.7,
-            'down': 0.6,
-            'problem': 0.4,
-            'issue': 0.3
-        }
+        if matches is None:
+            matches = self.keyword_matcher.find(text.lower())
         
         score = 0.0
-        for keyword, weight in urgency_keywords.items():
-            if keyword in text_lower:
-                score = max(score, weight)
+        for keyword in matches.present('urgency'):
+            score = max(score, self.urgency_keywords[keyword])
         
         return score
     
     def _preprocess_text(self, text: str) -> str:
-        """Preprocess text for classification"""
-        # Convert to lowercase
-        text = text.lower()
+        """Preprocess text for classification: lowercase letters and single spaces only"""
+        return Document.of(text).alpha_text
+    
+    def partial_fit(self, samples: List[Dict[str, Any]]) -> 'ComplaintClassifier':
+        """Fold a small batch of labeled complaints into copies of the models.
+        
+        Only the MultinomialNB count statistics are updated, via partial_fit, on
+        features from the already-fitted TF-IDF vectorizers; terms outside their
+        vocabulary are ignored until the next full retrain. The live instance is
+        left untouched and a new classifier is returned, so the caller can swap
+        it in atomically.
+        """
+        if not self.is_trained:
+            raise ValueError("Cannot update models that have not been trained")
         
-        # Remove special characters and numbers
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
+        from sklearn.pipeline import Pipeline
         
-        # Remove extra whitespace
-        text = ' '.join(text.split())
+        cleaned_texts = [self._preprocess_text(item['text']) for item in samples]
+        updated_models = []
         
-        return text
+        for model, field_name in ((self.category_model, 'category'), (self.priority_model, 'priority')):
+            labels = [item[field_name] for item in samples]
+            known_labels = set(model.classes_)
+            unknown = sorted(set(labels) - known_labels)
+            if unknown:
+                raise ValueError(
+                    f"Unknown {field_name} labels {unknown}; a full retrain is needed to add labels"
+                )
+            
+            vectorizer = model.named_steps['tfidf']
+            naive_bayes = copy.deepcopy(model.named_steps['classifier'])
+            naive_bayes.partial_fit(vectorizer.transform(cleaned_texts), labels)
+            
+            # The fitted vectorizer is never modified, so the copy can share it
+            updated_models.append(Pipeline([('tfidf', vectorizer), ('classifier', naive_bayes)]))
+        
+        updated = ComplaintClassifier(*updated_models, version=self.version)
+        updated.pending_updates = self.pending_updates + len(samples)
+        return updated
+    
+    def model_version(self) -> str:
+        """Identifier of the exact model state, including unsaved incremental updates"""
+        if self.pending_updates:
+            return f"{self.version}+{self.pending_updates}"
+        return str(self.version)
     
     def retrain(self, training_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Retrain models with new data"""
+        """Retrain models with new data.
+        
+        Blocks until training is done; the api uses RetrainManager to do this
+        in the background and swap in a new classifier instead.
+        """
         try:
-            texts = [item['text'] for item in training_data]
-            categories = [item['category'] for item in training_data]
-            priorities = [item['priority'] for item in training_data]
-            
-            # Split data for validation
-            X_train, X_test, y_cat_train, y_cat_test = train_test_split(
-                texts, categories, test_size=0.2, random_state=42
-            )
-            
-            _, _, y_pri_train, y_pri_test = train_test_split(
-                texts, priorities, test_size=0.2, random_state=42
-            )
+            category_model, priority_model, metrics = fit_models(training_data)
             
-            # Train models
-            self.category_model.fit(X_train, y_cat_train)
-            self.priority_model.fit(X_train, y_pri_train)
-            
-            # Calculate accuracy
-            cat_predictions = self.category_model.predict(X_test)
-            pri_predictions = self.priority_model.predict(X_test)
-            
-            cat_accuracy = accuracy_score(y_cat_test, cat_predictions)
-            pri_accuracy = accuracy_score(y_pri_test, pri_predictions)
+            # Replace both pipelines together once they are fully fitted
+            self.category_model, self.priority_model = category_model, priority_model
             
             # Save updated models
-            self._save_models()
+            self._save_models(metrics)
             
             return {
                 'status': 'success',
-                'category_accuracy': cat_accuracy,
-                'priority_accuracy': pri_accuracy,
-                'training_samples': len(training_data)
+                **metrics
             }
-            
+        
         except Exception as e:
             return {
                 'status': 'error',
@@ -0,0 +1,213 @@
+from typing import Any, Dict, Optional, Tuple
+
+from app.models.classifier import ComplaintClassifier, build_pipelines
+from app.models.registry import registry
+from app.models.sentiment import SentimentAnalyzer
+from app.utils.text_processing import Document
+
+# Keywords reported per conversation, as in ComplaintClassifier.analyze()
+MAX_KEYWORDS = 10
+
+# Shape of the sentiment features kept in a state, see SentimentAnalyzer.extract_features()
+SENTIMENT_NUMBERS = ('assessments', 'polarity_sum', 'subjectivity_sum', 'positive_words',
+                     'negative_words', 'words', 'chars', 'capitals', 'exclamations')
+SENTIMENT_LISTS = ('urgency_keywords', 'emotions')
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+class IncrementalAnalyzer:
+    """Analysis of a growing conversation, one message at a time.
+    
+    The state of a conversation holds only additive statistics of its
+    messages: term counts, the classifier's rule keywords and the sentiment
+    features of SentimentAnalyzer.extract_features(). update() reads the new
+    message alone; the models then score the summed term counts through the
+    classifier's LinearScorer, at a cost bounded by the vocabulary size
+    rather than the length of the conversation.
+    
+    Classification equals that of the user messages joined by spaces, up to
+    floating-point rounding and a keyword split across two messages.
+    Sentiment does not: TextBlob's word assessments are pooled per message,
+    so modifiers and negations never reach across messages and the polarity
+    generally differs from analyzing the joined transcript.
+    
+    States are plain JSON-serializable dicts and are updated in place.
+    """
+    
+    def __init__(self, classifier: Optional[ComplaintClassifier] = None,
+                 sentiment_analyzer: Optional[SentimentAnalyzer] = None):
+        # Without explicit models, the live ones are taken from the registry
+        self._classifier = classifier
+        self._sentiment_analyzer = sentiment_analyzer
+        self._term_analyzer = None
+    
+    @property
+    def classifier(self) -> ComplaintClassifier:
+        return self._classifier or registry.get_classifier()
+    
+    @property
+    def sentiment_analyzer(self) -> SentimentAnalyzer:
+        return self._sentiment_analyzer or registry.get_sentiment_analyzer()
+    
+    @property
+    def term_analyzer(self):
+        # Tokenization of the pipelines' vectorizers, which does not depend
+        # on fitting, so term counts stay valid across model versions; built
+        # on first use so importing this module does not load scikit-learn
+        if self._term_analyzer is None:
+            self._term_analyzer = build_pipelines()[0].named_steps['tfidf'].build_analyzer()
+        return self._term_analyzer
+    
+    def prepare(self, message: str) -> Dict[str, Any]:
+        """Per-message statistics; the costly part of update(), safe to run unlocked"""
+        classifier = self.classifier
+        document = Document(message)
+        alpha_text = document.alpha_text
+        
+        terms: Dict[str, int] = {}
+        for term in self.term_analyzer(alpha_text):
+            terms[term] = terms.get(term, 0) + 1
+        
+        matches = classifier.keyword_matcher.find(document.lower)
+        
+        return {
+            'terms': terms,
+            'keywords': classifier._keywords_from_cleaned(alpha_text),
+            'rule_keywords': sorted(matches.found),
+            'sentiment': self.sentiment_analyzer.extract_features(document.clean_text)
+        }
+    
+    @staticmethod
+    def validate_state(state: Any) -> None:
+        """Raise ValueError unless ``state`` has the shape apply() returns.
+        
+        States held by clients come back untrusted; checking them first keeps
+        a malformed one from failing halfway through apply().
+        """
+        if not isinstance(state, dict):
+            raise ValueError("State must be an object")
+        
+        messages = state.get('messages')
+        if not isinstance(messages, int) or isinstance(messages, bool) or messages < 0:
+            raise ValueError("State 'messages' must be a non-negative integer")
+        
+        terms = state.get('terms')
+        if not isinstance(terms, dict) or not all(
+            isinstance(count, int) and not isinstance(count, bool) and count > 0
+            for count in terms.values()
+        ):
+            raise ValueError("State 'terms' must map terms to positive integer counts")
+        
+        for key in ('keywords', 'rule_keywords'):
+            if not _is_string_list(state.get(key)):
+                raise ValueError(f"State '{key}' must be a list of strings")
+        
+        if 'sentiment' not in state:
+            raise ValueError("State 'sentiment' is missing")
+        sentiment = state['sentiment']
+        if sentiment is None:
+            return
+        if not isinstance(sentiment, dict):
+            raise ValueError("State 'sentiment' must be an object or null")
+        for key in SENTIMENT_NUMBERS:
+            if not _is_number(sentiment.get(key)):
+                raise ValueError(f"State 'sentiment.{key}' must be a number")
+        for key in SENTIMENT_LISTS:
+            if not _is_string_list(sentiment.get(key)):
+                raise ValueError(f"State 'sentiment.{key}' must be a list of strings")
+        if not isinstance(sentiment.get('is_complaint'), bool):
+            raise ValueError("State 'sentiment.is_complaint' must be a boolean")
+    
+    def update(self, state: Optional[Dict[str, Any]], message: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Add one message to a conversation state; returns the state and the new analysis"""
+        return self.apply(state, self.prepare(message))
+    
+    def apply(self, state: Optional[Dict[str, Any]],
+              prepared: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Add the output of prepare() to a conversation state"""
+        classifier = self.classifier
+        sentiment_analyzer = self.sentiment_analyzer
+        
+        if state is None:
+            state = {
+                'messages': 0,
+                'terms': {},
+                'keywords': [],
+                'rule_keywords': [],
+                'sentiment': None
+            }
+        
+        state['messages'] += 1
+        
+        previous_sentiment = state['sentiment']
+        state['sentiment'] = (
+            prepared['sentiment'] if previous_sentiment is None
+            else sentiment_analyzer.merge_features(previous_sentiment, prepared['sentiment'])
+        )
+        
+        if len(state['keywords']) < MAX_KEYWORDS:
+            state['keywords'] = (state['keywords'] + prepared['keywords'])[:MAX_KEYWORDS]
+        
+        state['rule_keywords'] = sorted(set(state['rule_keywords']).union(prepared['rule_keywords']))
+        
+        terms = state['terms']
+        for term, count in prepared['terms'].items():
+            terms[term] = terms.get(term, 0) + count
+        
+        category, priority, confidence = "General Inquiry", None, 0.0
+        if classifier.is_trained:
+            try:
+                category, confidence, priority = self._classify(classifier, terms)
+            except Exception as e:
+                print(f"Incremental analysis error: {e}")
+                category, priority, confidence = "General Inquiry", None, 0.0
+        
+        found = set(state['rule_keywords'])
+        if priority is None:
+            priority = 'Low'
+            for level, keywords in classifier.priority_keywords.items():
+                if any(keyword.lower() in found for keyword in keywords):
+                    priority = level
+                    break
+        
+        urgency_score = max(
+            (weight for keyword, weight in classifier.urgency_keywords.items() if keyword in found),
+            default=0.0
+        )
+        
+        return state, {
+            'category': category,
+            'priority': priority,
+            'confidence': confidence,
+            'keywords': list(state['keywords']),
+            'urgency_score': urgency_score,
+            'sentiment': sentiment_analyzer.score_features(state['sentiment'])
+        }
+    
+    def _classify(self, classifier: ComplaintClassifier, terms: Dict[str, int]) -> Tuple[str, float, str]:
+        """Category, its probability and priority of a conversation's term counts"""
+        scorer = classifier.linear_scorer()
+        if scorer is not None:
+            counts = scorer.count_terms(terms)
+            category_probabilities = scorer.category.predict_proba(counts)[0]
+            category_classes = scorer.category.classes_
+            priority_probabilities = scorer.priority.predict_proba(counts)[0]
+            priority_classes = scorer.priority.classes_
+        else:
+            # The pipelines take text; any text with the same term counts will do
+            text = ' '.join(term for term, count in terms.items() for _ in range(count))
+            category_probabilities = classifier.category_model.predict_proba([text])[0]
+            category_classes = classifier.category_model.classes_
+            priority_probabilities = classifier.priority_model.predict_proba([text])[0]
+            priority_classes = classifier.priority_model.classes_
+        
+        best = int(category_probabilities.argmax())
+        return (str(category_classes[best]), float(category_probabilities[best]),
+                str(priority_classes[int(priority_probabilities.argmax())]))
+
+# Shared by the chat session store and the api
+incremental_analyzer = IncrementalAnalyzer()
@@ -0,0 +1,179 @@
+import re
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+class LinearModel:
+    """Inference arrays of one fitted TF-IDF + MultinomialNB pipeline.
+    
+    ``columns`` maps every term of the scorer's shared term table to this
+    model's feature column, or -1 when the term is not in its vocabulary.
+    The remaining arrays are the fitted vectorizer's IDF weights and the
+    classifier's log probabilities, referenced rather than copied, so a
+    memory-mapped pipeline stays memory-mapped.
+    """
+    
+    def __init__(self, columns: np.ndarray, idf: np.ndarray, feature_log_prob: np.ndarray,
+                 class_log_prior: np.ndarray, classes: np.ndarray):
+        self.columns = columns
+        self.idf = idf
+        self.feature_log_prob = feature_log_prob
+        self.class_log_prior = class_log_prior
+        self.classes_ = classes
+    
+    def joint_log_likelihood(self, counts: 'TermCounts') -> np.ndarray:
+        """Naive Bayes class scores of the texts' L2-normalized TF-IDF rows.
+        
+        Mirrors TfidfVectorizer.transform() followed by MultinomialNB's
+        sparse product, operation for operation: features are visited in
+        column order within each row, norms are summed and class scores
+        accumulated one feature at a time, so the scores are bit-identical.
+        """
+        columns = self.columns[counts.terms]
+        known = columns >= 0
+        rows, columns, values = counts.rows[known], columns[known], counts.counts[known]
+        
+        order = np.lexsort((columns, rows))
+        rows, columns = rows[order], columns[order]
+        values = values[order] * self.idf[columns]
+        
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=counts.size))
+        norms[norms == 0.0] = 1.0
+        values /= norms[rows]
+        
+        joint = np.zeros((counts.size, len(self.classes_)))
+        np.add.at(joint, rows, values[:, np.newaxis] * self.feature_log_prob.T[columns])
+        return joint + self.class_log_prior
+    
+    def predict_proba(self, counts: 'TermCounts') -> np.ndarray:
+        """Class probabilities, as MultinomialNB.predict_proba() on the same texts"""
+        joint = self.joint_log_likelihood(counts)
+        return np.exp(joint - np.logaddexp.reduce(joint, axis=1)[:, np.newaxis])
+
+class TermCounts:
+    """Known-term counts of a batch of texts, as parallel (row, term, count) arrays"""
+    
+    def __init__(self, size: int, rows: np.ndarray, terms: np.ndarray, counts: np.ndarray):
+        self.size = size
+        self.rows = rows
+        self.terms = terms
+        self.counts = counts
+
+class LinearScorer:
+    """Lean scorer for the category and priority pipelines.
+    
+    Both pipelines tokenize text the same way and differ only in their
+    vocabularies, so their terms are merged into one table: a batch is
+    tokenized once into (row, term, count) arrays, and each model's
+    probabilities follow from them in a handful of NumPy operations.
+    sklearn's per-call input validation and its pipeline and vectorizer
+    machinery are skipped, which dominates the cost of scoring a single
+    short complaint.
+    
+    Class scores are bit-identical to the pipelines', so predictions are
+    identical; probabilities are normalized with numpy rather than scipy's
+    logsumexp and agree with predict_proba() up to floating-point rounding.
+    """
+    
+    def __init__(self, terms: Dict[str, int], token_pattern: str, stop_words: frozenset,
+                 lowercase: bool, category: LinearModel, priority: LinearModel):
+        self.terms = terms
+        self.token_pattern = re.compile(token_pattern)
+        self.stop_words = stop_words
+        self.lowercase = lowercase
+        self.category = category
+        self.priority = priority
+    
+    @classmethod
+    def from_pipelines(cls, category_model, priority_model) -> 'LinearScorer':
+        """Export two fitted pipelines; ValueError if they are not plain TF-IDF + MultinomialNB"""
+        vectorizers = [_check_pipeline(model) for model in (category_model, priority_model)]
+        tokenization = {
+            (vectorizer.token_pattern, frozenset(vectorizer.get_stop_words() or ()), vectorizer.lowercase)
+            for vectorizer in vectorizers
+        }
+        if len(tokenization) != 1:
+            raise ValueError("The pipelines tokenize text differently")
+        token_pattern, stop_words, lowercase = tokenization.pop()
+        
+        terms: Dict[str, int] = {}
+        for vectorizer in vectorizers:
+            for term in vectorizer.vocabulary_:
+                terms.setdefault(term, len(terms))
+        
+        models = []
+        for model, vectorizer in zip((category_model, priority_model), vectorizers):
+            columns = np.full(len(terms), -1, dtype=np.int32)
+            for term, column in vectorizer.vocabulary_.items():
+                columns[terms[term]] = column
+            
+            naive_bayes = model.named_steps['classifier']
+            models.append(LinearModel(
+                columns, vectorizer.idf_, naive_bayes.feature_log_prob_,
+                naive_bayes.class_log_prior_, naive_bayes.classes_
+            ))
+        
+        return cls(terms, token_pattern, stop_words, lowercase, *models)
+    
+    def vectorize(self, texts: Sequence[str]) -> TermCounts:
+        """Counts of known terms per text, over the shared term table"""
+        rows: List[int] = []
+        terms: List[int] = []
+        values: List[int] = []
+        
+        for row, text in enumerate(texts):
+            counts: Dict[int, int] = {}
+            for token in self.token_pattern.findall(text.lower() if self.lowercase else text):
+                if token in self.stop_words:
+                    continue
+                term = self.terms.get(token)
+                if term is not None:
+                    counts[term] = counts.get(term, 0) + 1
+            rows.extend([row] * len(counts))
+            terms.extend(counts)
+            values.extend(counts.values())
+        
+        return TermCounts(
+            len(texts), np.array(rows, dtype=np.intp), np.array(terms, dtype=np.intp),
+            np.array(values, dtype=np.float64)
+        )
+    
+    def count_terms(self, term_counts: Dict[str, int]) -> TermCounts:
+        """Counts of one text given as already-tokenized ``{term: count}``"""
+        known = [(self.terms[term], count) for term, count in term_counts.items() if term in self.terms]
+        return TermCounts(
+            1, np.zeros(len(known), dtype=np.intp),
+            np.array([term for term, _ in known], dtype=np.intp),
+            np.array([count for _, count in known], dtype=np.float64)
+        )
+    
+    def predict_proba(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Category and priority probabilities of preprocessed texts"""
+        counts = self.vectorize(texts)
+        return self.category.predict_proba(counts), self.priority.predict_proba(counts)
+
+def _check_pipeline(pipeline) -> 'TfidfVectorizer':
+    """The pipeline's vectorizer, if the scorer reproduces the pipeline exactly"""
+    # Only ever called with fitted pipelines, so scikit-learn is loaded by now
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    
+    vectorizer = pipeline.named_steps.get('tfidf')
+    naive_bayes = pipeline.named_steps.get('classifier')
+    if not isinstance(vectorizer, TfidfVectorizer) or type(naive_bayes) is not MultinomialNB:
+        raise ValueError("Only TF-IDF + MultinomialNB pipelines can be exported")
+    
+    settings = {
+        'input': 'content', 'analyzer': 'word', 'ngram_range': (1, 1), 'tokenizer': None,
+        'preprocessor': None, 'strip_accents': None, 'binary': False, 'norm': 'l2',
+        'use_idf': True, 'sublinear_tf': False, 'dtype': np.float64
+    }
+    for name, expected in settings.items():
+        if getattr(vectorizer, name) != expected:
+            raise ValueError(f"Cannot export a vectorizer with {name}={getattr(vectorizer, name)!r}")
+    if re.compile(vectorizer.token_pattern).groups > 1:
+        raise ValueError("Cannot export a token pattern with several capturing groups")
+    return vectorizer
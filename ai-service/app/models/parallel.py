@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.models.sentiment import SentimentAnalyzer
+from app.utils.text_processing import Document
+
+# Models warmed once per worker process by _init_worker
+_worker_sentiment_analyzer: Optional[SentimentAnalyzer] = None
+
+def _init_worker(load_classifier: bool) -> None:
+    global _worker_sentiment_analyzer
+    _worker_sentiment_analyzer = SentimentAnalyzer()
+    # Build TextBlob's lexicon now rather than inside the first shard
+    _worker_sentiment_analyzer.analyze('warm up')
+    
+    if load_classifier:
+        from app.models.registry import registry
+        registry.preload()
+
+def _summarize_shard(texts: List[str]) -> Dict[str, Any]:
+    return _worker_sentiment_analyzer.partial_summary(texts)
+
+def _analyze_shard(texts: List[str]) -> List[Dict[str, Any]]:
+    from app.models.registry import registry
+    
+    documents = [Document(text) for text in texts]
+    classifications = registry.get_classifier().analyze_batch(documents)
+    sentiments = _worker_sentiment_analyzer.analyze_batch(documents)
+    return [
+        {**classification.to_dict(), 'sentiment': sentiment}
+        for classification, sentiment in zip(classifications, sentiments)
+    ]
+
+class BulkAnalyzer:
+    """Spreads bulk sentiment and complaint analysis across CPU cores.
+    
+    TextBlob scoring is pure Python and holds the GIL, so threads don't help;
+    this shards the texts across a process pool whose workers warm their
+    models once and then keep them for every shard they process. The pool
+    starts with the first job and lives until close().
+    """
+    
+    def __init__(self, workers: Optional[int] = None, shard_size: int = 500,
+                 load_classifier: bool = False):
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.load_classifier = load_classifier
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def __enter__(self) -> 'BulkAnalyzer':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def iter_partial_summaries(self, texts: List[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (shard index, partial summary) as soon as each shard finishes"""
+        executor = self._get_executor()
+        futures = {
+            executor.submit(_summarize_shard, shard): index
+            for index, shard in enumerate(self._shards(texts))
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    
+    def sentiment_summary(self, texts: List[str]) -> Dict[str, Any]:
+        """Same result as SentimentAnalyzer.get_sentiment_summary, computed in parallel"""
+        partials = dict(self.iter_partial_summaries(texts))
+        # Merge in shard order so the result never depends on completion order
+        return SentimentAnalyzer.merge_partial_summaries(
+            [partials[index] for index in sorted(partials)]
+        )
+    
+    def analyze(self, texts: List[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Full classification + sentiment, yielding one list of results per shard in input order"""
+        if not self.load_classifier:
+            raise ValueError("BulkAnalyzer was created without load_classifier=True")
+        
+        return self._get_executor().map(_analyze_shard, self._shards(texts))
+    
+    def _shards(self, texts: List[str]) -> List[List[str]]:
+        # Enough shards to keep every worker busy, but never below shard_size
+        # texts each so the per-task pickling overhead stays small
+        size = max(self.shard_size, -(-len(texts) // (self.workers * 4)))
+        return [texts[i:i + size] for i in range(0, len(texts), size)]
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned rather than forked: callers may be threaded servers,
+            # whose locks a forked child could inherit in a held state
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.load_classifier,)
+            )
+        return self._executor
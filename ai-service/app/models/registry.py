@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.classifier import ComplaintClassifier
+from app.models.sentiment import SentimentAnalyzer
+from app.utils.metrics import MODEL_LOAD_SECONDS, metrics
+
+class ModelRegistry:
+    """Process-wide owner of the loaded AI models.
+    
+    Every consumer (the Flask app in main.py, the api blueprint, ...) asks the
+    registry for its models instead of constructing its own, so each model is
+    loaded exactly once per process. Calling preload() before the server forks
+    lets preforked workers share the loaded pages copy-on-write.
+    
+    Retrains, checkpoints and rollbacks move the model store's CURRENT
+    pointer from whichever worker handled them. Every process checks that
+    pointer at most every ``reload_interval`` seconds (AI_MODEL_RELOAD_SECONDS,
+    0 disables) on its way through get_classifier() and loads the new version
+    when it moved, so all workers converge on the same model.
+    """
+    
+    def __init__(self, reload_interval: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._classifier: Optional[ComplaintClassifier] = None
+        self._sentiment_analyzer: Optional[SentimentAnalyzer] = None
+        self.reload_interval = reload_interval if reload_interval is not None else float(
+            os.environ.get('AI_MODEL_RELOAD_SECONDS', 5)
+        )
+        self._next_reload_check = 0.0
+        self._reload_hooks: List[Callable[[ComplaintClassifier], ComplaintClassifier]] = []
+    
+    def add_reload_hook(self, hook: Callable[[ComplaintClassifier], ComplaintClassifier]) -> None:
+        """Pass every classifier loaded by load_version() through ``hook`` before it is served"""
+        self._reload_hooks.append(hook)
+    
+    def get_classifier(self) -> ComplaintClassifier:
+        """Return the shared complaint classifier, loading it on first use"""
+        classifier = self._classifier
+        if classifier is None:
+            with self._lock:
+                if self._classifier is None:
+                    started = time.perf_counter()
+                    self._classifier = ComplaintClassifier()
+                    MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model='classifier')
+                    self._next_reload_check = time.monotonic() + self.reload_interval
+                classifier = self._classifier
+        elif self.reload_interval > 0 and time.monotonic() >= self._next_reload_check:
+            classifier = self.reload_if_stale()
+        return classifier
+    
+    def reload_if_stale(self) -> ComplaintClassifier:
+        """Load the store's current version if another process has moved CURRENT"""
+        # Pushed forward first, so concurrent requests don't all hit the disk
+        self._next_reload_check = time.monotonic() + self.reload_interval
+        
+        classifier = self._classifier
+        try:
+            latest = classifier.store.current_version()
+        except OSError as e:
+            print(f"Model reload check failed: {e}")
+            return classifier
+        if latest is None or latest == classifier.version:
+            return classifier
+        
+        with self._lock:
+            current = self._classifier
+            if current.version != latest:
+                try:
+                    self._classifier = self.load_version(current, latest)
+                    print(f"Reloaded model version {latest} (was {current.version})")
+                except (OSError, ValueError) as e:
+                    # Keep serving the current models; the next check retries
+                    print(f"Model reload of version {latest} failed: {e}")
+            return self._classifier
+    
+    def load_version(self, current: ComplaintClassifier, version: str) -> ComplaintClassifier:
+        """A classifier for a stored version, read from the live classifier's store.
+        
+        Reload hooks run on it, e.g. to re-apply this process's online
+        updates that are not checkpointed yet. Call with the swap lock held.
+        """
+        started = time.perf_counter()
+        category_model, priority_model, version = current.store.load(version)
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model='classifier')
+        
+        return self._run_reload_hooks(
+            ComplaintClassifier(category_model, priority_model, version=version)
+        )
+    
+    def _run_reload_hooks(self, classifier: ComplaintClassifier) -> ComplaintClassifier:
+        for hook in self._reload_hooks:
+            classifier = hook(classifier)
+        return classifier
+    
+    def get_sentiment_analyzer(self) -> SentimentAnalyzer:
+        """Return the shared sentiment analyzer, creating it on first use"""
+        analyzer = self._sentiment_analyzer
+        if analyzer is None:
+            with self._lock:
+                if self._sentiment_analyzer is None:
+                    started = time.perf_counter()
+                    self._sentiment_analyzer = SentimentAnalyzer()
+                    MODEL_LOAD_SECONDS.set(time.perf_counter() - started, model='sentiment')
+                analyzer = self._sentiment_analyzer
+        return analyzer
+    
+    def set_classifier(self, classifier: ComplaintClassifier) -> None:
+        """Atomically replace the live classifier.
+        
+        Requests that already fetched the previous instance keep using it until
+        they finish; new requests get the replacement.
+        """
+        with self._lock:
+            self._classifier = classifier
+    
+    def update_classifier(self, update: Callable[[ComplaintClassifier], ComplaintClassifier]) -> ComplaintClassifier:
+        """Replace the live classifier with ``update(current)``.
+        
+        The swap lock is held while ``update`` runs, so concurrent updates and
+        retrain swaps are applied one after another instead of overwriting
+        each other. Readers are never blocked.
+        """
+        self.get_classifier()
+        with self._lock:
+            self._classifier = update(self._classifier)
+            return self._classifier
+    
+    def deploy(self, classifier: ComplaintClassifier,
+               metrics: Optional[Dict[str, Any]] = None) -> ComplaintClassifier:
+        """Save newly built models as the store's current version and make them live.
+        
+        The save holds the store lock, so it cannot interleave with an online
+        update checkpoint, and the models go through the reload hooks like any
+        other version this process switches to.
+        """
+        def save(current: ComplaintClassifier) -> ComplaintClassifier:
+            with classifier.store.lock():
+                classifier._save_models(metrics)
+            return self._run_reload_hooks(classifier)
+        
+        return self.update_classifier(save)
+    
+    def rollback(self, version: Optional[str] = None) -> ComplaintClassifier:
+        """Make a stored model version (by default the previous one) current and live.
+        
+        Goes live in this process right away; the other workers follow when
+        they next see the moved CURRENT pointer.
+        """
+        def load(current: ComplaintClassifier) -> ComplaintClassifier:
+            with current.store.lock():
+                target = current.store.rollback(version)
+            return self.load_version(current, target)
+        
+        return self.update_classifier(load)
+    
+    def preload(self) -> None:
+        """Load every model now, e.g. in the master process before forking workers"""
+        self.get_classifier()
+        self.get_sentiment_analyzer()
+    
+    def model_info(self) -> Dict[tuple, float]:
+        """Version of the live classifier as a metric label; never loads a model"""
+        classifier = self._classifier
+        if classifier is None:
+            return {}
+        return {(classifier.model_version(),): 1.0}
+
+# Singleton shared by the whole process
+registry = ModelRegistry()
+metrics.gauge('ai_model_info', 'Version of the live classifier (always 1)', ('version',),
+              callback=registry.model_info)
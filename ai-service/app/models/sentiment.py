@@ -1,77 +1,68 @@
-import re
-from typing import Dict, Any, List
-from textblob import TextBlob
+import os
+from typing import Dict, Any, List, Optional, Sequence, Union
+
+from app.models.lexicon_sentiment import ASSESSMENTS, NEGATIVE, POLARITY, POSITIVE, SUBJECTIVITY
+from app.utils.keyword_matcher import KeywordMatcher, load_lexicons
+from app.utils.text_processing import Document
+
+# Sentiment engines: TextBlob per text, or the vectorized lexicon table
+SENTIMENT_ENGINES = ('textblob', 'lexicon')
+
+def _textblob_sentiment():
+    # TextBlob pulls in NLTK (and with it pandas and much of scikit-learn),
+    # so it is imported when the first analyzer is built, not with this module
+    from textblob.en import sentiment
+    return sentiment
 
 class SentimentAnalyzer:
-    """Sentiment analysis for complaint text"""
+    """Sentiment analysis for complaint text.
     
-    def __init__(self):
+    The 'lexicon' engine (``engine`` or the AI_SENTIMENT_ENGINE variable)
+    scores whole batches with LexiconSentimentEngine instead of running
+    TextBlob on each text; see that class for how closely it follows
+    TextBlob.
+    """
+    
+    def __init__(self, engine: Optional[str] = None):
         self.sentiment_labels = {
             'positive': 'Positive',
             'negative': 'Negative',
             'neutral': 'Neutral'
         }
         
-        # Keywords for enhanced sentiment detection
-        self.positive_keywords = [
-            'good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic',
-            'satisfied', 'happy', 'pleased', 'thank', 'appreciate', 'love'
-        ]
+        # Keywords for enhanced sentiment detection; see app/models/lexicons.json
+        lexicons = load_lexicons()['sentiment']
+        self.positive_keywords = lexicons['positive']
+        self.negative_keywords = lexicons['negative']
+        self.urgency_keywords = lexicons['urgency']
+        self.emotion_keywords = lexicons['emotions']
+        self.complaint_indicators = lexicons['complaint_indicators']
         
-        self.negative_keywords = [
-            'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate',
-            'angry', 'frustrated', 'disappointed', 'upset', 'annoyed',
-            'broken', 'failed', 'wrong', 'issue', 'problem', 'error'
-        ]
+        # Every rule feature of a text is found in a single scan
+        self.keyword_matcher = KeywordMatcher({
+            'positive': self.positive_keywords,
+            'negative': self.negative_keywords,
+            'urgency': self.urgency_keywords,
+            'complaint': self.complaint_indicators,
+            **{f'emotion:{emotion}': keywords for emotion, keywords in self.emotion_keywords.items()}
+        })
         
-        self.urgency_keywords = [
-            'urgent', 'emergency', 'critical', 'immediately', 'asap',
-            'serious', 'important', 'priority'
-        ]
+        self.engine = (engine or os.environ.get('AI_SENTIMENT_ENGINE', 'textblob')).lower()
+        if self.engine not in SENTIMENT_ENGINES:
+            raise ValueError(f"Unknown sentiment engine '{self.engine}'; use one of {', '.join(SENTIMENT_ENGINES)}")
+        self.lexicon_engine = None
+        if self.engine == 'lexicon':
+            from app.models.lexicon_sentiment import LexiconSentimentEngine
+            self.lexicon_engine = LexiconSentimentEngine(self.positive_keywords, self.negative_keywords)
+        else:
+            _textblob_sentiment()
     
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def analyze(self, text: Union[str, Document]) -> Dict[str, Any]:
         """Analyze sentiment of given text"""
         try:
             # Clean the text
-            cleaned_text = self._preprocess_text(text)
-            
-            # Use TextBlob for basic sentiment analysis
-            blob = TextBlob(cleaned_text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
-            
-            # Enhance with keyword-based analysis
-            keyword_sentiment = self._keyword_based_sentiment(cleaned_text)
-            
-            # Combine scores
-            final_polarity = (polarity + keyword_sentiment) / 2
-            
-            # Determine sentiment label
-            if final_polarity > 0.1:
-                sentiment = 'Positive'
-            elif final_polarity < -0.1:
-                sentiment = 'Negative'
-            else:
-                sentiment = 'Neutral'
-            
-            # Calculate confidence
-            confidence = abs(final_polarity)
-            
-            # Detect urgency
-            urgency_score = self._detect_urgency(cleaned_text)
-            
-            # Detect emotions
-            emotions = self._detect_emotions(cleaned_text)
-            
-            return {
-                'sentiment': sentiment,
-                'polarity': round(final_polarity, 3),
-                'subjectivity': round(subjectivity, 3),
-                'confidence': round(confidence, 3),
-                'urgency_score': round(urgency_score, 3),
-                'emotions': emotions,
-                'is_complaint': self._is_complaint(cleaned_text)
-            }
+            cleaned_text = Document.of(text).clean_text
+            return self.score_features(self.extract_features(cleaned_text))
             
         except Exception as e:
             print(f"Sentiment analysis error: {e}")
@@ -85,45 +76,154 @@ class SentimentAnalyzer:
                 'is_complaint': True
             }
     
-    def _preprocess_text(self, text: str) -> str:
-        """Preprocess text for sentiment analysis"""
-        # Convert to lowercase
-        text = text.lower()
+    def analyze_batch(self, texts: Sequence[Union[str, Document]]) -> List[Dict[str, Any]]:
+        """Analyze sentiment of many texts, preserving order"""
+        try:
+            features = self.extract_features_batch([Document.of(text).clean_text for text in texts])
+        except Exception as e:
+            print(f"Batch sentiment analysis error: {e}")
+            return [self.analyze(text) for text in texts]
+        
+        return [self.score_features(text_features) for text_features in features]
+    
+    def extract_features(self, cleaned_text: str) -> Dict[str, Any]:
+        """Additive counts behind the sentiment of a preprocessed text.
+        
+        Features of consecutive texts combine with merge_features() so a
+        growing conversation can be scored without re-reading earlier
+        messages. The result pools each message's word assessments, which is
+        not the same as analyzing the texts joined into one: TextBlob's
+        modifiers and negations never reach across messages.
+        """
+        return self.extract_features_batch([cleaned_text])[0]
+    
+    def extract_features_batch(self, cleaned_texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """extract_features() of many preprocessed texts"""
+        matches = [self.keyword_matcher.find(cleaned_text) for cleaned_text in cleaned_texts]
         
-        # Remove URLs, email addresses
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        text = re.sub(r'\S+@\S+', '', text)
+        if self.lexicon_engine is not None:
+            # Lexicon scores and keyword counts of the whole batch in one go
+            scores = [
+                (int(row[ASSESSMENTS]), float(row[POLARITY]), float(row[SUBJECTIVITY]),
+                 int(row[POSITIVE]), int(row[NEGATIVE]))
+                for row in self.lexicon_engine.score_batch(cleaned_texts)
+            ]
+        else:
+            pattern_sentiment = _textblob_sentiment()
+            scores = []
+            for cleaned_text, text_matches in zip(cleaned_texts, matches):
+                # TextBlob's default analyzer: its polarity and subjectivity
+                # are the means over these assessments
+                assessments = pattern_sentiment(cleaned_text).assessments
+                scores.append((
+                    len(assessments),
+                    sum(polarity for _, polarity, _, _ in assessments),
+                    sum(subjectivity for _, _, subjectivity, _ in assessments),
+                    text_matches.token_count('positive'),
+                    text_matches.token_count('negative')
+                ))
         
-        # Remove extra whitespace
-        text = ' '.join(text.split())
+        return [
+            {
+                'assessments': assessments,
+                'polarity_sum': polarity_sum,
+                'subjectivity_sum': subjectivity_sum,
+                'positive_words': positive_words,
+                'negative_words': negative_words,
+                'words': len(cleaned_text.split()),
+                'chars': len(cleaned_text),
+                'capitals': sum(1 for c in cleaned_text if c.isupper()),
+                'exclamations': cleaned_text.count('!'),
+                'urgency_keywords': text_matches.present('urgency'),
+                'emotions': [
+                    emotion for emotion in self.emotion_keywords
+                    if text_matches.contains(f'emotion:{emotion}')
+                ],
+                'is_complaint': text_matches.contains('complaint')
+            }
+            for cleaned_text, text_matches, (assessments, polarity_sum, subjectivity_sum,
+                                             positive_words, negative_words)
+            in zip(cleaned_texts, matches, scores)
+        ]
+    
+    def merge_features(self, first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """Pooled features of two texts, each assessed on its own"""
+        merged = {
+            key: first[key] + second[key]
+            for key in ('assessments', 'polarity_sum', 'subjectivity_sum', 'positive_words',
+                        'negative_words', 'words', 'chars', 'capitals', 'exclamations')
+        }
+        if first['chars'] and second['chars']:
+            merged['chars'] += 1
         
-        return text
+        merged['urgency_keywords'] = list(dict.fromkeys(first['urgency_keywords'] + second['urgency_keywords']))
+        emotions = set(first['emotions']).union(second['emotions'])
+        merged['emotions'] = [emotion for emotion in self.emotion_keywords if emotion in emotions]
+        merged['is_complaint'] = first['is_complaint'] or second['is_complaint']
+        return merged
     
-    def _keyword_based_sentiment(self, text: str) -> float:
-        """Enhanced sentiment scoring based on keywords"""
-        words = text.split()
-        positive_count = sum(1 for word in words if word in self.positive_keywords)
-        negative_count = sum(1 for word in words if word in self.negative_keywords)
+    def score_features(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """Sentiment result from extract_features() or merge_features() output"""
+        # Use TextBlob for basic sentiment analysis
+        assessments = float(features['assessments'] or 1)
+        polarity = features['polarity_sum'] / assessments
+        subjectivity = features['subjectivity_sum'] / assessments
         
-        total_words = len(words)
+        # Enhance with keyword-based analysis
+        keyword_sentiment = self._keyword_based_sentiment(features)
+        
+        # Combine scores
+        final_polarity = (polarity + keyword_sentiment) / 2
+        
+        # Determine sentiment label
+        if final_polarity > 0.1:
+            sentiment = 'Positive'
+        elif final_polarity < -0.1:
+            sentiment = 'Negative'
+        else:
+            sentiment = 'Neutral'
+        
+        # Calculate confidence
+        confidence = abs(final_polarity)
+        
+        # Detect urgency
+        urgency_score = self._detect_urgency(features)
+        
+        return {
+            'sentiment': sentiment,
+            'polarity': round(final_polarity, 3),
+            'subjectivity': round(subjectivity, 3),
+            'confidence': round(confidence, 3),
+            'urgency_score': round(urgency_score, 3),
+            'emotions': list(features['emotions']),
+            'is_complaint': features['is_complaint']
+        }
+    
+    def _preprocess_text(self, text: str) -> str:
+        """Preprocess text for sentiment analysis: lowercase, no URLs or emails"""
+        return Document.of(text).clean_text
+    
+    def _keyword_based_sentiment(self, features: Dict[str, Any]) -> float:
+        """Enhanced sentiment scoring based on keywords"""
+        total_words = features['words']
         if total_words == 0:
             return 0.0
         
         # Calculate sentiment score
-        sentiment_score = (positive_count - negative_count) / total_words
+        sentiment_score = (features['positive_words'] - features['negative_words']) / total_words
         
         # Normalize to [-1, 1] range
         return max(-1.0, min(1.0, sentiment_score * 10))
     
-    def _detect_urgency(self, text: str) -> float:
+    def _detect_urgency(self, features: Dict[str, Any]) -> float:
         """Detect urgency level in text"""
-        urgency_count = sum(1 for word in self.urgency_keywords if word in text)
+        urgency_count = len(features['urgency_keywords'])
         
         # Check for multiple exclamation marks
-        exclamation_count = text.count('!')
+        exclamation_count = features['exclamations']
         
         # Check for capital letters (indicating shouting)
-        capital_ratio = sum(1 for c in text if c.isupper()) / len(text) if text else 0
+        capital_ratio = features['capitals'] / features['chars'] if features['chars'] else 0
         
         # Combine factors
         urgency_score = (urgency_count * 0.3 + 
@@ -132,60 +232,60 @@ class SentimentAnalyzer:
         
         return min(1.0, urgency_score)
     
-    def _detect_emotions(self, text: str) -> List[str]:
-        """Detect specific emotions in text"""
-        emotions = []
-        
-        # Emotion keywords mapping
-        emotion_keywords = {
-            'anger': ['angry', 'furious', 'mad', 'rage', 'pissed', 'livid'],
-            'frustration': ['frustrated', 'annoyed', 'irritated', 'fed up'],
-            'sadness': ['sad', 'disappointed', 'upset', 'depressed'],
-            'fear': ['worried', 'concerned', 'anxious', 'scared'],
-            'joy': ['happy', 'pleased', 'satisfied', 'delighted'],
-            'surprise': ['surprised', 'shocked', 'amazed', 'unexpected']
-        }
+    def get_sentiment_summary(self, texts: List[str], workers: Optional[int] = None) -> Dict[str, Any]:
+        """Analyze sentiment for multiple texts and provide summary.
         
-        for emotion, keywords in emotion_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                emotions.append(emotion)
+        With ``workers`` > 1 the texts are sharded across a process pool; the
+        result is identical to the sequential summary.
+        """
+        if workers is not None and workers > 1:
+            from app.models.parallel import BulkAnalyzer
+            with BulkAnalyzer(workers) as bulk_analyzer:
+                return bulk_analyzer.sentiment_summary(texts)
         
-        return emotions
+        return self.merge_partial_summaries([self.partial_summary(texts)])
     
-    def _is_complaint(self, text: str) -> bool:
-        """Determine if text is likely a complaint"""
-        complaint_indicators = [
-            'complaint', 'issue', 'problem', 'error', 'bug', 'fault',
-            'not working', 'broken', 'failed', 'wrong', 'bad', 'terrible',
-            'disappointed', 'unsatisfied', 'refund', 'return'
-        ]
+    def partial_summary(self, texts: List[str]) -> Dict[str, Any]:
+        """Mergeable aggregate of a shard of texts.
+        
+        Rounded polarity and urgency scores are accumulated as integer
+        thousandths, so merging shards in any order or grouping gives exactly
+        the same totals as a single pass.
+        """
+        sentiment_counts = {'Positive': 0, 'Negative': 0, 'Neutral': 0}
+        polarity_total = 0
+        urgency_total = 0
+        
+        for result in self.analyze_batch(texts):
+            sentiment_counts[result['sentiment']] += 1
+            polarity_total += round(result['polarity'] * 1000)
+            urgency_total += round(result['urgency_score'] * 1000)
         
-        return any(indicator in text for indicator in complaint_indicators)
+        return {
+            'count': len(texts),
+            'sentiment_counts': sentiment_counts,
+            'polarity_total': polarity_total,
+            'urgency_total': urgency_total
+        }
     
-    def get_sentiment_summary(self, texts: List[str]) -> Dict[str, Any]:
-        """Analyze sentiment for multiple texts and provide summary"""
-        sentiments = []
-        polarities = []
-        urgencies = []
-        
-        for text in texts:
-            result = self.analyze(text)
-            sentiments.append(result['sentiment'])
-            polarities.append(result['polarity'])
-            urgencies.append(result['urgency_score'])
+    @staticmethod
+    def merge_partial_summaries(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine partial_summary() results into the final summary"""
+        total = sum(partial['count'] for partial in partials)
         
         # Calculate statistics
         sentiment_counts = {
-            'Positive': sentiments.count('Positive'),
-            'Negative': sentiments.count('Negative'),
-            'Neutral': sentiments.count('Neutral')
+            label: sum(partial['sentiment_counts'][label] for partial in partials)
+            for label in ('Positive', 'Negative', 'Neutral')
         }
         
-        avg_polarity = sum(polarities) / len(polarities) if polarities else 0
-        avg_urgency = sum(urgencies) / len(urgencies) if urgencies else 0
+        polarity_total = sum(partial['polarity_total'] for partial in partials)
+        urgency_total = sum(partial['urgency_total'] for partial in partials)
+        avg_polarity = polarity_total / 1000 / total if total else 0
+        avg_urgency = urgency_total / 1000 / total if total else 0
         
         return {
-            'total_analyzed': len(texts),
+            'total_analyzed': total,
             'sentiment_distribution': sentiment_counts,
             'average_polarity': round(avg_polarity, 3),
             'average_urgency': round(avg_urgency, 3),
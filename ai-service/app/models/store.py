@@ -0,0 +1,187 @@
+import copy
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import joblib
+
+# ai-service/models, independent of the working directory the service starts in
+DEFAULT_MODEL_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'models'
+)
+
+class ModelStore:
+    """Versioned on-disk storage for the trained classifier pipelines.
+    
+    Each save goes to a fresh ``versions/<version>`` directory that is fully
+    written under a temporary name and then renamed into place, and the
+    ``CURRENT`` pointer is replaced atomically afterwards, so a reader never
+    sees a half-written model. Every version carries a ``manifest.json`` with
+    file checksums and training metrics.
+    
+    Pipelines are written uncompressed, so their numpy arrays (IDF vectors,
+    NB log-probability and count matrices) are loaded with ``mmap_mode='r'``:
+    every worker maps the same file pages instead of holding a private copy.
+    """
+    
+    CATEGORY_FILE = 'category_model.pkl'
+    PRIORITY_FILE = 'priority_model.pkl'
+    MANIFEST_FILE = 'manifest.json'
+    
+    def __init__(self, root: Optional[str] = None, mmap: Optional[bool] = None):
+        self.root = root or os.environ.get('MODEL_DIR', DEFAULT_MODEL_DIR)
+        self.mmap = mmap if mmap is not None else (
+            os.environ.get('MODEL_MMAP', 'True').lower() == 'true'
+        )
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.current_file = os.path.join(self.root, 'CURRENT')
+    
+    def current_version(self) -> Optional[str]:
+        """Version the CURRENT pointer refers to, if any"""
+        try:
+            with open(self.current_file) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+    
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """Manifests of all stored versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.'):
+                continue
+            try:
+                manifests.append(self.manifest(name))
+            except FileNotFoundError:
+                continue
+        return sorted(manifests, key=lambda manifest: manifest['created_at'])
+    
+    def manifest(self, version: str) -> Dict[str, Any]:
+        """Manifest of a stored version"""
+        with open(os.path.join(self.versions_dir, version, self.MANIFEST_FILE)) as f:
+            return json.load(f)
+    
+    def save(self, category_model, priority_model, metrics: Optional[Dict[str, Any]] = None) -> str:
+        """Write both pipelines as a new version and make it current"""
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(self.versions_dir, exist_ok=True)
+        
+        staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=self.versions_dir)
+        try:
+            files = {}
+            for file_name, model in ((self.CATEGORY_FILE, category_model),
+                                     (self.PRIORITY_FILE, priority_model)):
+                path = os.path.join(staging_dir, file_name)
+                joblib.dump(_strip_for_storage(model), path)
+                files[file_name] = {'sha256': _sha256(path), 'bytes': os.path.getsize(path)}
+            
+            manifest = {
+                'version': version,
+                'created_at': time.time(),
+                'files': files,
+                'metrics': metrics or {}
+            }
+            with open(os.path.join(staging_dir, self.MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            
+            os.rename(staging_dir, os.path.join(self.versions_dir, version))
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        self._set_current(version)
+        return version
+    
+    def load(self, version: Optional[str] = None, verify: bool = True) -> Tuple[object, object, str]:
+        """Load a version (the current one by default).
+        
+        Raises FileNotFoundError when there is nothing to load and ValueError
+        when a file doesn't match the checksum in its manifest.
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No model version recorded in {self.current_file}")
+        
+        version_dir = os.path.join(self.versions_dir, version)
+        manifest = self.manifest(version)
+        
+        models = []
+        for file_name in (self.CATEGORY_FILE, self.PRIORITY_FILE):
+            path = os.path.join(version_dir, file_name)
+            if verify and _sha256(path) != manifest['files'][file_name]['sha256']:
+                raise ValueError(f"Checksum mismatch for {file_name} in model version {version}")
+            models.append(joblib.load(path, mmap_mode='r' if self.mmap else None))
+        
+        return models[0], models[1], version
+    
+    def rollback(self, version: Optional[str] = None) -> str:
+        """Point CURRENT at ``version``, or at the version saved before the current one"""
+        if version is None:
+            versions = [manifest['version'] for manifest in self.list_versions()]
+            current = self.current_version()
+            if current not in versions or versions.index(current) == 0:
+                raise ValueError("No earlier model version to roll back to")
+            version = versions[versions.index(current) - 1]
+        
+        # Make sure the target exists and is intact before switching
+        self.load(version)
+        self._set_current(version)
+        return version
+    
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on the store, shared by every process using the same root.
+        
+        Held around read-modify-write sequences such as "load CURRENT, fold
+        updates into it, save", so two workers cannot both build on the same
+        version and have the later save silently drop the earlier one.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def _set_current(self, version: str) -> None:
+        """Atomically point CURRENT at the given version"""
+        fd, tmp_path = tempfile.mkstemp(prefix='.CURRENT-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_file)
+
+def _strip_for_storage(pipeline):
+    """A copy of the pipeline without attributes only kept for introspection.
+    
+    ``stop_words_`` on a fitted TfidfVectorizer holds every term cut by
+    max_features and can dwarf the actual model; sklearn documents it as safe
+    to delete before pickling. The pipeline being saved may be the one
+    serving requests, so the steps are shallow-copied rather than modified;
+    the copies share the fitted arrays.
+    """
+    stripped = copy.copy(pipeline)
+    stripped.steps = []
+    for name, step in pipeline.steps:
+        if hasattr(step, 'stop_words_'):
+            step = copy.copy(step)
+            del step.stop_words_
+        stripped.steps.append((name, step))
+    return stripped
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
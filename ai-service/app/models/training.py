@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.models.classifier import ComplaintClassifier, fit_models
+from app.models.registry import ModelRegistry, registry
+
+# Texts every freshly trained model must score before it is allowed to go live
+VALIDATION_PROBES = [
+    "My internet connection is very slow",
+    "I was charged twice for the same service",
+    "Cannot login to my account",
+    "",
+]
+
+class RetrainManager:
+    """Runs model retraining off the request path and hot-swaps the result.
+    
+    Fitting happens in a separate process, so serving threads are never
+    blocked by it. When a job finishes, the new pipelines are validated,
+    written to the model store as a new version, and only then swapped into
+    the registry. Requests already in flight finish on the classifier they
+    started with. Other worker processes pick the new version up from the
+    store's CURRENT pointer (see ModelRegistry).
+    """
+    
+    # Finished jobs kept around for the status endpoint
+    MAX_JOBS = 50
+    
+    def __init__(self, model_registry: ModelRegistry = registry,
+                 min_accuracy: Optional[float] = None):
+        self.registry = model_registry
+        self.min_accuracy = min_accuracy if min_accuracy is not None else float(
+            os.environ.get('AI_RETRAIN_MIN_ACCURACY', 0.0)
+        )
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    
+    def submit(self, training_data: List[Dict[str, Any]]) -> str:
+        """Queue a retrain job and return its id immediately"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'running',
+                'training_samples': len(training_data),
+                'submitted_at': time.time(),
+                'finished_at': None,
+                'version': None,
+                'metrics': None,
+                'error': None
+            }
+            while len(self._jobs) > self.MAX_JOBS:
+                self._jobs.popitem(last=False)
+            
+            future = self._get_executor().submit(fit_models, training_data)
+        
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job's status, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # One job at a time, in a long-lived child process. Serving workers
+            # run threads, so the child is spawned fresh rather than forked
+            # with their locks possibly held
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+    
+    def _finish(self, job_id: str, future: Future) -> None:
+        """Validate, persist and swap in the models produced by a job"""
+        try:
+            category_model, priority_model, metrics = future.result()
+            self._validate(category_model, priority_model, metrics)
+            
+            deployed = self.registry.deploy(ComplaintClassifier(category_model, priority_model), metrics)
+            
+            self._update(job_id, status='completed', metrics=metrics, version=deployed.version)
+            print(f"Retrain job {job_id} deployed model version {deployed.version}")
+        except Exception as e:
+            print(f"Retrain job {job_id} failed: {e}")
+            self._update(job_id, status='failed', error=str(e))
+    
+    def _validate(self, category_model, priority_model, metrics: Dict[str, Any]) -> None:
+        """Raise ValueError if the new models must not replace the live ones"""
+        for name, model in (('category', category_model), ('priority', priority_model)):
+            if len(model.classes_) < 2:
+                raise ValueError(f"{name} model was trained on fewer than two labels")
+            
+            probabilities = model.predict_proba(VALIDATION_PROBES)
+            if probabilities.shape != (len(VALIDATION_PROBES), len(model.classes_)) \
+                    or not np.all(np.isfinite(probabilities)):
+                raise ValueError(f"{name} model produced invalid probabilities")
+            
+            accuracy = metrics.get(f'{name}_accuracy', 0.0)
+            if accuracy < self.min_accuracy:
+                raise ValueError(
+                    f"{name} accuracy {accuracy:.3f} is below the minimum {self.min_accuracy:.3f}"
+                )
+    
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get('status') in ('completed', 'failed'):
+                job['finished_at'] = time.time()
+
+# Shared by the api blueprint
+retrain_manager = RetrainManager()
+
+class OnlineLearner:
+    """Folds small batches of labeled complaints into the live models.
+    
+    Each update produces a new classifier through partial_fit and swaps it
+    into the registry, which takes milliseconds instead of a full refit. The
+    updated models are checkpointed to the model store once enough samples
+    have accumulated or enough time has passed since the last checkpoint.
+    
+    Updates land in the worker process that received them and reach the
+    other workers through checkpoints, which they reload from the store.
+    Samples not checkpointed yet are kept and re-applied whenever this
+    process switches to another version (another worker's checkpoint, a
+    retrain deployed here or elsewhere, or a rollback), and a checkpoint always builds on the store's latest
+    version under the store lock, so no worker's updates overwrite another's.
+    """
+    
+    def __init__(self, model_registry: ModelRegistry = registry,
+                 checkpoint_every: Optional[int] = None,
+                 checkpoint_interval: Optional[float] = None):
+        self.registry = model_registry
+        self.checkpoint_every = checkpoint_every or int(
+            os.environ.get('AI_ONLINE_CHECKPOINT_EVERY', 100)
+        )
+        self.checkpoint_interval = checkpoint_interval or float(
+            os.environ.get('AI_ONLINE_CHECKPOINT_SECONDS', 300)
+        )
+        self._last_checkpoint = time.monotonic()
+        # Samples applied since the last checkpoint; guarded by the registry's swap lock
+        self._pending: List[Dict[str, Any]] = []
+        model_registry.add_reload_hook(self._replay)
+    
+    def update(self, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply labeled samples to the live models and checkpoint if due.
+        
+        Raises ValueError when a sample carries a label the models don't know.
+        """
+        checkpoint_version = None
+        
+        def apply(current: ComplaintClassifier) -> ComplaintClassifier:
+            nonlocal checkpoint_version
+            updated = current.partial_fit(samples)
+            self._pending.extend(samples)
+            if self._checkpoint_due(updated):
+                updated = self._checkpoint(updated)
+                checkpoint_version = updated.version
+            return updated
+        
+        updated = self.registry.update_classifier(apply)
+        
+        return {
+            'status': 'success',
+            'applied_samples': len(samples),
+            'model_version': updated.model_version(),
+            'pending_updates': updated.pending_updates,
+            'checkpoint_version': checkpoint_version
+        }
+    
+    def _checkpoint(self, updated: ComplaintClassifier) -> ComplaintClassifier:
+        """Save the pending samples on top of the store's latest version"""
+        with updated.store.lock():
+            latest = updated.store.current_version()
+            if latest is not None and latest != updated.version:
+                # Another worker saved since this one loaded its models
+                updated = self.registry.load_version(updated, latest)
+            
+            updated._save_models({
+                'base_version': updated.version,
+                'incremental_updates': updated.pending_updates
+            })
+        
+        self._pending = []
+        self._last_checkpoint = time.monotonic()
+        return updated
+    
+    def _replay(self, classifier: ComplaintClassifier) -> ComplaintClassifier:
+        """Re-apply the samples not checkpointed yet to a freshly loaded classifier"""
+        if not self._pending:
+            return classifier
+        try:
+            return classifier.partial_fit(self._pending)
+        except ValueError as e:
+            print(f"Dropping {len(self._pending)} online updates not valid for model version {classifier.version}: {e}")
+            self._pending = []
+            return classifier
+    
+    def _checkpoint_due(self, classifier: ComplaintClassifier) -> bool:
+        return (classifier.pending_updates >= self.checkpoint_every or
+                time.monotonic() - self._last_checkpoint >= self.checkpoint_interval)
+
+online_learner = OnlineLearner()
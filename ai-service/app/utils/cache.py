@@ -0,0 +1,189 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+class LocalCacheBackend:
+    """In-process LRU cache with a per-entry time to live.
+    
+    Values are stored and returned as is, so callers share them, unless
+    ``copy_values`` is set: then get() and set() work on deep copies, like
+    the Redis backend's JSON round trip, for values that callers modify.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, copy_values: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.copy_values = copy_values
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Striped locks serialize update() calls on the same key without
+        # holding the cache-wide lock while the update function runs
+        self._update_locks = [threading.Lock() for _ in range(64)]
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value) if self.copy_values else value
+    
+    def set(self, key: str, value: Any) -> None:
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def update(self, key: str, function: Callable[[Optional[Any]], Any]) -> Any:
+        """Store and return ``function(current value or None)``, one update per key at a time"""
+        with self._update_locks[hash(key) % len(self._update_locks)]:
+            value = function(self.get(key))
+            self.set(key, value)
+            return value
+    
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Cache shared between workers and hosts, stored in Redis as JSON"""
+    
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = 'ai-service:analysis:'):
+        # Only needed when the shared backend is configured
+        import redis
+        
+        self.client = redis.Redis.from_url(url)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+        self._watch_error = redis.WatchError
+    
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+    
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+    
+    def update(self, key: str, function: Callable[[Optional[Any]], Any]) -> Any:
+        """Store and return ``function(current value or None)`` atomically across workers.
+        
+        Optimistic: the key is WATCHed while ``function`` runs, and the write
+        is retried with a fresh value if another client changed it meanwhile,
+        so ``function`` must not have side effects.
+        """
+        name = self.prefix + key
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(name)
+                    current = pipe.get(name)
+                    value = function(json.loads(current) if current is not None else None)
+                    pipe.multi()
+                    pipe.set(name, json.dumps(value), ex=self.ttl)
+                    pipe.execute()
+                    return value
+                except self._watch_error:
+                    continue
+    
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+    
+    def clear(self) -> None:
+        # Entries of old model versions are never read again and expire on their own
+        pass
+    
+    def __len__(self) -> int:
+        return 0
+
+class ResultCache:
+    """Caches analysis results keyed on lowercased text plus model version.
+    
+    Texts that differ only in case produce identical analysis, so they share
+    an entry. Whitespace is kept: rule matching such as the urgency phrases
+    runs on the lowercased text as is, so "not  working" and "not working"
+    can be scored differently. Because the model version is part of the key, a
+    retrain, incremental update or rollback makes every older entry
+    unreachable; the in-process backend is also emptied as soon as a new
+    version is seen.
+    """
+    
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else LocalCacheBackend()
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case-insensitive form of a text"""
+        return text.lower()
+    
+    def make_key(self, text: str, version: str) -> str:
+        digest = hashlib.sha256(self.normalize(text).encode('utf-8')).hexdigest()
+        return f"{version}:{digest}"
+    
+    def get(self, text: str, version: str) -> Optional[Any]:
+        """Cached result for ``text`` under ``version``, or None"""
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self.backend.clear()
+                    self._version = version
+        
+        value = self.backend.get(self.make_key(text, version))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+    
+    def set(self, text: str, version: str, value: Any) -> None:
+        self.backend.set(self.make_key(text, version), value)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'size': len(self.backend)
+        }
+
+def create_result_cache() -> Optional[ResultCache]:
+    """Build the cache from the environment; None when AI_CACHE_SIZE is 0"""
+    max_size = int(os.environ.get('AI_CACHE_SIZE', 10000))
+    if max_size <= 0:
+        return None
+    
+    ttl = float(os.environ.get('AI_CACHE_TTL', 3600))
+    if os.environ.get('AI_CACHE_BACKEND', 'local').lower() == 'redis':
+        backend = RedisCacheBackend(os.environ.get('REDIS_URL', 'redis://localhost:6379/0'), ttl)
+    else:
+        backend = LocalCacheBackend(max_size, ttl)
+    
+    return ResultCache(backend)
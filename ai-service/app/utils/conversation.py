@@ -0,0 +1,148 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.utils.keyword_matcher import KeywordMatcher, load_lexicons
+
+SPEAKER_LABELS = {
+    'User:': '\n**User:**',
+    'Bot:': '\n**Assistant:**'
+}
+
+# Month names, full or abbreviated, as a prefix trie so the engine does not
+# try two dozen alternatives at every word
+MONTHS = (
+    r'(?:[Jj](?:an(?:uary)?|u(?:ne?|ly?))|[Ff]eb(?:ruary)?|[Mm]a(?:r(?:ch)?|y)'
+    r'|[Aa](?:pr(?:il)?|ug(?:ust)?)|[Ss]ep(?:t(?:ember)?)?|[Oo]ct(?:ober)?'
+    r'|[Nn]ov(?:ember)?|[Dd]ec(?:ember)?)'
+)
+
+# Entity group name -> key in the extracted entities
+ENTITY_KEYS = {
+    'url': 'urls',
+    'email': 'emails',
+    'phone': 'phones',
+    'date': 'dates',
+    'amount': 'amounts',
+    'amount_symbol': 'amounts',
+    'order_id': 'order_ids'
+}
+
+# Speaker markers and every entity type in one alternation, so a transcript
+# is scanned once whatever the number of entity types. Alternatives are
+# tried in this order at each position and matches never overlap: the
+# local part of an email or a path segment of a URL is not reported again
+# as an order ID. The word-boundary alternatives share a single \b test.
+CONVERSATION_PATTERN = re.compile('|'.join([
+    r'(?P<speaker>User:|Bot:)',
+    r'(?P<amount_symbol>[$€£₹]\s?\d[\d,]*(?:\.\d{1,2})?)',
+    r'\b(?:' + '|'.join([
+        r'(?P<url>https?://[^\s<>"\']*[^\s<>"\'.,;:!?)\]])',
+        r'(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)',
+        r'(?P<phone>\d{3}-\d{3}-\d{4}\b|\(\d{3}\)\s*\d{3}-\d{4}\b)',
+        r'(?P<date>\d{4}-\d{2}-\d{2}\b|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
+        r'|' + MONTHS + r'\.?\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?\b)',
+        r'(?P<amount>\d[\d,]*(?:\.\d{1,2})?\s?(?i:usd|eur|gbp|inr|dollars|euros|pounds|rupees)\b)',
+        r'(?P<order_id>[A-Z]{2,}\d{4,}\b)'
+    ]) + ')'
+]))
+
+@dataclass(frozen=True)
+class ExtractedConversation:
+    """Everything /api/extract-complaint-data needs from one transcript"""
+    first_user_message: Optional[str]
+    transcript: str
+    entities: Dict[str, List[str]] = field(default_factory=dict)
+    keywords: List[str] = field(default_factory=list)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'first_user_message': self.first_user_message,
+            'transcript': self.transcript,
+            'entities': self.entities,
+            'keywords': self.keywords
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ExtractedConversation':
+        return cls(**data)
+
+class ConversationExtractor:
+    """Extracts complaint fields from a chat transcript in a single scan.
+    
+    One pass of CONVERSATION_PATTERN finds the speaker markers, used for
+    the title and the formatted transcript, together with emails, phone
+    numbers, order IDs, amounts, dates and URLs. Tag keywords come from
+    one KeywordMatcher call on the lowercased transcript.
+    """
+    
+    def __init__(self):
+        self.tag_keywords = load_lexicons()['conversation']['tags']
+        self.keyword_matcher = KeywordMatcher({'tags': self.tag_keywords})
+    
+    def extract(self, conversation: str) -> ExtractedConversation:
+        first_user_start = None
+        entities: Dict[str, List[str]] = {}
+        transcript: List[str] = []
+        position = 0
+        
+        for match in CONVERSATION_PATTERN.finditer(conversation):
+            kind = match.lastgroup
+            value = match.group()
+            
+            if kind == 'speaker':
+                start = match.start()
+                if first_user_start is None and value == 'User:' and \
+                        (start == 0 or conversation[start - 1] == '\n'):
+                    first_user_start = start
+                transcript.append(conversation[position:start])
+                transcript.append(SPEAKER_LABELS[value])
+                position = match.end()
+            else:
+                entities.setdefault(ENTITY_KEYS[kind], []).append(value)
+        
+        transcript.append(conversation[position:])
+        
+        first_user_message = None
+        if first_user_start is not None:
+            line_end = conversation.find('\n', first_user_start)
+            line = conversation[first_user_start:line_end if line_end != -1 else len(conversation)]
+            first_user_message = line.replace('User:', '').strip()
+        
+        matches = self.keyword_matcher.find(conversation.lower())
+        
+        return ExtractedConversation(
+            first_user_message=first_user_message,
+            transcript=''.join(transcript),
+            entities=entities,
+            keywords=matches.present('tags')
+        )
+    
+    def extend(self, previous: Optional[ExtractedConversation], lines: str) -> ExtractedConversation:
+        """Extraction of ``previous``'s conversation followed by ``lines``.
+        
+        Only the new lines are scanned; speaker markers never span a line
+        break, so the result is the same as extracting the whole joined
+        conversation (barring an entity split across the join).
+        """
+        if previous is None or not previous.transcript:
+            return self.extract(lines)
+        
+        added = self.extract('\n' + lines)
+        entities = {key: list(values) for key, values in previous.entities.items()}
+        for key, values in added.entities.items():
+            entities.setdefault(key, []).extend(values)
+        
+        found = set(previous.keywords).union(added.keywords)
+        
+        return ExtractedConversation(
+            first_user_message=(
+                previous.first_user_message if previous.first_user_message is not None
+                else added.first_user_message
+            ),
+            transcript=previous.transcript + added.transcript,
+            entities=entities,
+            keywords=[keyword for keyword in self.keyword_matcher.lexicons['tags'] if keyword in found]
+        )
+
+conversation_extractor = ConversationExtractor()
@@ -0,0 +1,136 @@
+import copy
+import json
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Keyword lists shipped with the service; AI_LEXICONS_PATH can point at a JSON
+# file with the same layout to override any of them without code changes
+DEFAULT_LEXICONS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', 'lexicons.json'
+)
+
+@lru_cache(maxsize=None)
+def _read_lexicons(default_path: str, override_path: str) -> Dict[str, Any]:
+    with open(default_path) as f:
+        lexicons = json.load(f)
+    
+    if override_path:
+        with open(override_path) as f:
+            overrides = json.load(f)
+        for section, values in overrides.items():
+            lexicons.setdefault(section, {}).update(values)
+    
+    return lexicons
+
+def load_lexicons() -> Dict[str, Any]:
+    """Keyword lexicons: the shipped defaults with AI_LEXICONS_PATH merged over them"""
+    lexicons = _read_lexicons(DEFAULT_LEXICONS_PATH, os.environ.get('AI_LEXICONS_PATH', ''))
+    # Callers may keep and modify their sections
+    return copy.deepcopy(lexicons)
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation shaped like a prefix trie.
+    
+    Shared prefixes are matched once, so the engine does a single walk per
+    start position instead of trying every keyword; a longer continuation is
+    always preferred over stopping at a shorter keyword.
+    """
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node: Dict[str, Any]) -> str:
+        is_terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_terminal:
+            return '(?:' + body + ')?'
+        return body
+    
+    return build(trie)
+
+class KeywordMatches:
+    """Keywords found in one text by a KeywordMatcher"""
+    
+    __slots__ = ('_lexicons', 'found', '_text', '_tokens')
+    
+    def __init__(self, lexicons: Dict[str, tuple], found: Set[str], text: str):
+        self._lexicons = lexicons
+        self.found = found
+        self._text = text
+        self._tokens: Optional[Counter] = None
+    
+    def contains(self, lexicon: str) -> bool:
+        """Whether any keyword of the lexicon occurs as a substring"""
+        return not self.found.isdisjoint(self._lexicons[lexicon])
+    
+    def present(self, lexicon: str) -> List[str]:
+        """Keywords of the lexicon occurring as substrings, in lexicon order"""
+        return [keyword for keyword in self._lexicons[lexicon] if keyword in self.found]
+    
+    def token_count(self, lexicon: str) -> int:
+        """Number of whitespace-delimited tokens equal to a keyword of the lexicon"""
+        keywords = self.found.intersection(self._lexicons[lexicon])
+        if not keywords:
+            return 0
+        
+        if self._tokens is None:
+            # Only texts containing a keyword somewhere are ever tokenized
+            self._tokens = Counter(self._text.split())
+        return sum(self._tokens[keyword] for keyword in keywords)
+
+class KeywordMatcher:
+    """Finds the keywords of several lexicons in a text in one shared pass.
+    
+    Every rule feature of a text (sentiment words, urgency terms, emotions,
+    complaint indicators...) comes from a single ``find`` call whose result
+    answers ``keyword in text`` for every keyword, and ``token == keyword``
+    counts for every whitespace-delimited token.
+    
+    Large lexicons are compiled into one trie-shaped regex wrapped in a
+    lookahead, so a single ``findall`` reports every (possibly overlapping)
+    occurrence: at each position the regex yields the longest keyword, and
+    the shorter keywords starting there are its prefixes, looked up from a
+    table built at init. Below REGEX_MIN_KEYWORDS keywords, CPython's
+    substring search over each keyword is faster than the regex engine's
+    per-position overhead, so small lexicons use that instead; both give
+    identical results.
+    """
+    
+    REGEX_MIN_KEYWORDS = 150
+    
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.lexicons = {
+            name: tuple(dict.fromkeys(keyword.lower() for keyword in keywords if keyword))
+            for name, keywords in lexicons.items()
+        }
+        
+        self.keywords = tuple(sorted({keyword for words in self.lexicons.values() for keyword in words}))
+        self._pattern = None
+        if len(self.keywords) >= self.REGEX_MIN_KEYWORDS:
+            self._pattern = re.compile('(?=(' + _trie_pattern(self.keywords) + '))')
+            # Every keyword implied by a longest match: itself and its keyword prefixes
+            self._implied = {
+                keyword: frozenset(other for other in self.keywords if keyword.startswith(other))
+                for keyword in self.keywords
+            }
+    
+    def find(self, text: str) -> KeywordMatches:
+        """All keyword occurrences in ``text`` (expected to be lowercase already)"""
+        if self._pattern is None:
+            found = {keyword for keyword in self.keywords if keyword in text}
+        else:
+            found = set()
+            implied = self._implied
+            for keyword in set(self._pattern.findall(text)):
+                found.update(implied[keyword])
+        
+        return KeywordMatches(self.lexicons, found, text)
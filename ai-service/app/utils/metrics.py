@@ -0,0 +1,223 @@
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond stages to slow chatbot calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def samples(self, worker: str) -> Iterator[str]:
+        raise NotImplementedError
+    
+    def render(self, worker: str) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples(worker))
+        return '\n'.join(lines)
+
+class _ValueMetric(_Metric):
+    """One value per label set, optionally read from a callback at scrape time"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        # Returns {label values: value}; used for state owned by other objects
+        self.callback = callback
+    
+    def samples(self, worker: str) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        for key, value in values.items():
+            yield f"{self.name}{_labels(self.labelnames, key, worker)} {_number(value)}"
+
+class Counter(_ValueMetric):
+    """Monotonic count, optionally split by labels"""
+    kind = 'counter'
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_ValueMetric):
+    """Current value, optionally split by labels"""
+    kind = 'gauge'
+    
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed cumulative buckets"""
+    kind = 'histogram'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+    
+    def samples(self, worker: str) -> Iterator[str]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(bound)}"')
+                le = le[:-1] + f',{worker}}}' if worker else le
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key, worker)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key, worker)} {cumulative}"
+
+class MetricsRegistry:
+    """The metrics of this process, rendered in the Prometheus text format.
+    
+    Metrics live in process memory, so behind gunicorn every worker counts
+    its own requests; each series carries a ``worker`` label with the pid,
+    and queries aggregate across workers with sum().
+    """
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, callback))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        worker = f'worker="{os.getpid()}"'
+        with self._lock:
+            metrics = list(self._metrics.values())
+        
+        blocks = []
+        for metric in metrics:
+            try:
+                blocks.append(metric.render(worker))
+            except Exception as e:
+                # A failing callback must not take the other metrics down
+                print(f"Metrics error in {metric.name}: {e}")
+        return '\n'.join(blocks) + '\n'
+
+# Content type of MetricsRegistry.render() output
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+metrics = MetricsRegistry()
+
+REQUESTS = metrics.counter(
+    'ai_http_requests_total', 'HTTP requests handled, by route, method and status',
+    ('route', 'method', 'status')
+)
+REQUEST_ERRORS = metrics.counter(
+    'ai_http_request_errors_total', 'HTTP requests that ended in a 5xx response', ('route', 'method')
+)
+REQUEST_LATENCY = metrics.histogram(
+    'ai_http_request_duration_seconds', 'HTTP request latency', ('route', 'method')
+)
+STAGE_LATENCY = metrics.histogram(
+    'ai_stage_duration_seconds', 'Time spent in each analysis stage', ('stage',)
+)
+CHATBOT_LATENCY = metrics.histogram(
+    'ai_chatbot_backend_duration_seconds', 'Chatbot backend call latency, by backend and outcome',
+    ('backend', 'outcome')
+)
+MODEL_LOAD_SECONDS = metrics.gauge(
+    'ai_model_load_seconds', 'Time taken to load or build each model', ('model',)
+)
+
+# Stage timings of the request (or task) running in this context, for
+# reporting one request's breakdown; None when nobody is collecting
+current_stages: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    'current_stages', default=None
+)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one analysis stage.
+    
+    The duration goes to ai_stage_duration_seconds and, while a request is
+    collecting its own breakdown (see collect_stages()), to that request's
+    totals as well.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=name)
+        stages = current_stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + elapsed
+
+def collect_stages() -> Tuple[Dict[str, float], contextvars.Token]:
+    """Start collecting stage timings for the current context"""
+    stages: Dict[str, float] = {}
+    return stages, current_stages.set(stages)
+
+def observe_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Record one handled HTTP request"""
+    REQUESTS.inc(route=route, method=method, status=str(status))
+    REQUEST_LATENCY.observe(seconds, route=route, method=method)
+    if status >= 500:
+        REQUEST_ERRORS.inc(route=route, method=method)
@@ -0,0 +1,237 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.utils.metrics import collect_stages, current_stages
+
+# Distinct stacks kept before new ones are folded into "(other)", so a long
+# profiling session cannot grow without bound
+MAX_STACKS = 20000
+MAX_DEPTH = 128
+
+class StackSampler:
+    """Wall-clock sampling profiler for selected threads.
+    
+    While at least one thread is registered, a background thread wakes every
+    ``interval`` seconds, reads the registered threads' current frames from
+    sys._current_frames() and counts each stack in collapsed form
+    (``root;outer;...;inner``), the input format of flamegraph.pl and
+    speedscope. Because samples are taken on wall-clock time, a thread that
+    is waiting for the GIL, a lock or the micro-batcher shows up where it
+    waits. Nothing runs while no thread is registered.
+    """
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._frame_names: Dict[Any, str] = {}
+        # Longest first, so frames are named relative to the most specific entry
+        self._path_prefixes = sorted(
+            (os.path.join(os.path.abspath(entry), '') for entry in sys.path if entry),
+            key=len, reverse=True
+        )
+    
+    def add(self, thread_id: int, root: str) -> None:
+        """Start sampling ``thread_id``, with ``root`` as the bottom frame of its stacks"""
+        with self._lock:
+            # A sampler started before gunicorn forked does not exist in the worker
+            if self._sampler is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._sampler = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._sampler.start()
+            self._threads[thread_id] = root
+            self._active.set()
+    
+    def remove(self, thread_id: int) -> None:
+        with self._lock:
+            self._threads.pop(thread_id, None)
+            if not self._threads:
+                self._active.clear()
+    
+    def collapsed(self, reset: bool = False) -> str:
+        """Stacks sampled so far, one ``stack count`` line each, most frequent first"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+            if reset:
+                self._stacks = Counter()
+                self.samples = 0
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+    
+    def _run(self) -> None:
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                threads = dict(self._threads)
+            if not threads:
+                continue
+            
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, root in threads.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks.append(self._collapse(frame, root))
+            del frames
+            
+            with self._lock:
+                for stack in stacks:
+                    if stack not in self._stacks and len(self._stacks) >= MAX_STACKS:
+                        stack = stack.split(';', 1)[0] + ';(other)'
+                    self._stacks[stack] += 1
+                    self.samples += 1
+    
+    def _collapse(self, frame, root: str) -> str:
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        names.append(root)
+        names.reverse()
+        return ';'.join(names)
+    
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            filename = code.co_filename
+            for prefix in self._path_prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):]
+                    break
+            # ";" separates frames in the collapsed format
+            name = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ',')
+            self._frame_names[code] = name
+        return name
+
+class RequestTrace:
+    """Profiling state of one in-flight request"""
+    
+    def __init__(self, method: str, route: str, path: str, sampler: Optional[StackSampler]):
+        self.method = method
+        self.route = route
+        self.path = path
+        self.stages, self._stages_token = collect_stages()
+        self._sampler = sampler
+        self._thread_id = threading.get_ident()
+        if sampler is not None:
+            sampler.add(self._thread_id, f"{method} {route}")
+    
+    @property
+    def profiled(self) -> bool:
+        return self._sampler is not None
+    
+    def close(self) -> None:
+        """Stop sampling and collecting stages; safe to call more than once"""
+        if self._sampler is not None:
+            self._sampler.remove(self._thread_id)
+        if self._stages_token is not None:
+            current_stages.reset(self._stages_token)
+            self._stages_token = None
+
+class RequestProfiler:
+    """Opt-in per-request profiling and slow-request logging.
+    
+    A request is profiled when it carries the ``X-Profile`` header with a
+    valid ``X-Profile-Token`` or falls in the sampled ``sample_rate`` fraction
+    of traffic; its stacks are added to the sampler's aggregate under a
+    ``METHOD route`` root frame. Independently,
+    a request slower than ``slow_threshold`` seconds is logged with the time
+    it spent in each analysis stage and kept among the recent slow requests.
+    Stages that run on the micro-batcher's thread are not attributed to the
+    request, and cached results have no stages.
+    """
+    
+    PROFILE_HEADER = 'X-Profile'
+    TOKEN_HEADER = 'X-Profile-Token'
+    
+    def __init__(self, profiling: bool = False, sample_rate: float = 0.0,
+                 slow_threshold: Optional[float] = None, token: Optional[str] = None,
+                 interval: float = 0.005, max_slow_requests: int = 100):
+        self.sampler = StackSampler(interval) if profiling else None
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.token = token
+        self._slow_requests: deque = deque(maxlen=max_slow_requests)
+    
+    def authorized(self, headers: Mapping[str, str]) -> bool:
+        """Whether a request may trigger profiling or read results.
+        
+        Stacks and slow-request records expose code paths and request URLs,
+        so without a configured token no request is authorized.
+        """
+        if not self.token:
+            return False
+        return hmac.compare_digest(headers.get(self.TOKEN_HEADER, ''), self.token)
+    
+    def begin(self, method: str, route: str, path: str, headers: Mapping[str, str]) -> RequestTrace:
+        profile = self.sampler is not None and (
+            (self.PROFILE_HEADER in headers and self.authorized(headers))
+            or (self.sample_rate > 0 and random.random() < self.sample_rate)
+        )
+        return RequestTrace(method, route, path, self.sampler if profile else None)
+    
+    def finish(self, trace: RequestTrace, status: int, seconds: float) -> None:
+        trace.close()
+        if self.slow_threshold is None or seconds < self.slow_threshold:
+            return
+        
+        record = {
+            'method': trace.method,
+            'route': trace.route,
+            'path': trace.path,
+            'status': status,
+            'duration_ms': round(seconds * 1000, 3),
+            'stages_ms': {name: round(elapsed * 1000, 3) for name, elapsed in trace.stages.items()},
+            'profiled': trace.profiled,
+            'timestamp': time.time()
+        }
+        self._slow_requests.append(record)
+        
+        stages = ', '.join(f"{name} {elapsed:.1f}ms" for name, elapsed in record['stages_ms'].items())
+        print(
+            f"Slow request: {trace.method} {trace.path} -> {status} in {record['duration_ms']:.1f}ms "
+            f"(stages: {stages or 'none recorded'})"
+        )
+    
+    def slow_requests(self) -> List[Dict[str, Any]]:
+        """The most recent slow requests, oldest first"""
+        return list(self._slow_requests)
+    
+    def collapsed_stacks(self, reset: bool = False) -> str:
+        return self.sampler.collapsed(reset) if self.sampler is not None else ''
+
+def create_request_profiler() -> Optional[RequestProfiler]:
+    """Build the profiler from the environment.
+    
+    None unless AI_PROFILING is true or AI_SLOW_REQUEST_MS is set, so the
+    default request path does no profiling work at all. The X-Profile header
+    and the /admin endpoints also need AI_PROFILING_TOKEN.
+    """
+    profiling = os.environ.get('AI_PROFILING', 'False').lower() == 'true'
+    slow_ms = float(os.environ.get('AI_SLOW_REQUEST_MS', 0))
+    if not profiling and slow_ms <= 0:
+        return None
+    
+    token = os.environ.get('AI_PROFILING_TOKEN') or None
+    if token is None:
+        print("AI_PROFILING_TOKEN is not set: X-Profile is ignored and /admin/profile "
+              "and /admin/slow-requests are forbidden")
+    
+    return RequestProfiler(
+        profiling=profiling,
+        sample_rate=float(os.environ.get('AI_PROFILE_SAMPLE_RATE', 0.0)),
+        slow_threshold=slow_ms / 1000.0 if slow_ms > 0 else None,
+        token=token,
+        interval=float(os.environ.get('AI_PROFILE_INTERVAL_MS', 5)) / 1000.0
+    )
@@ -1,34 +1,74 @@
 import re
 import string
-from typing import List, Dict, Any
+from collections import Counter
+from functools import cached_property
+from typing import List, Dict, Any, Union
+
+# Compiled once at import; every normalization below goes through these
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z\s]')
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+class Document:
+    """A text plus the normalized views the analyzers need.
+    
+    Each view is computed on first use and then reused, so the classifier,
+    sentiment analyzer and feature extractors can share one Document instead
+    of each lowercasing, stripping and splitting the same text again:
+    
+    - ``clean_text``: lowercase, URLs and emails removed, whitespace collapsed
+      (sentiment analysis)
+    - ``normalized_text`` / ``tokens`` / ``token_counts``: ``clean_text``
+      without punctuation (preprocess_text and the feature extractors)
+    - ``alpha_text``: lowercase letters and whitespace only (classification)
+    """
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+    
+    @classmethod
+    def of(cls, text: Union[str, 'Document']) -> 'Document':
+        """``text`` as a Document, reusing it if it already is one"""
+        return text if isinstance(text, Document) else cls(text)
+    
+    @cached_property
+    def clean_text(self) -> str:
+        text = URL_PATTERN.sub('', self.lower)
+        text = EMAIL_PATTERN.sub('', text)
+        return ' '.join(text.split())
+    
+    @cached_property
+    def normalized_text(self) -> str:
+        return ' '.join(self.tokens)
+    
+    @cached_property
+    def tokens(self) -> List[str]:
+        return self.clean_text.translate(PUNCTUATION_TABLE).split()
+    
+    @cached_property
+    def token_counts(self) -> Counter:
+        return Counter(self.tokens)
+    
+    @cached_property
+    def alpha_text(self) -> str:
+        return ' '.join(NON_ALPHA_PATTERN.sub('', self.lower).split())
 
 def preprocess_text(text: str) -> str:
     """Clean and preprocess text for analysis"""
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    
-    # Remove email addresses
-    text = re.sub(r'\S+@\S+', '', text)
-    
-    # Remove punctuation
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    
-    return text
+    return Document.of(text).normalized_text
 
 def tokenize_text(text: str) -> List[str]:
     """Tokenize text into words"""
-    cleaned_text = preprocess_text(text)
-    return cleaned_text.split()
+    return list(Document.of(text).tokens)
 
-def extract_features(text: str) -> Dict[str, Any]:
+def extract_features(text: Union[str, Document]) -> Dict[str, Any]:
     """Extract various features from text"""
-    tokens = tokenize_text(text)
+    document = Document.of(text)
+    text = document.text
+    tokens = document.tokens
+    capital_letters = sum(1 for c in text if c.isupper())
     
     features = {
         'word_count': len(tokens),
@@ -37,41 +77,48 @@ def extract_features(text: str) -> Dict[str, Any]:
         'avg_word_length': sum(len(word) for word in tokens) / len(tokens) if tokens else 0,
         'exclamation_count': text.count('!'),
         'question_count': text.count('?'),
-        'capital_letters': sum(1 for c in text if c.isupper()),
-        'capital_ratio': sum(1 for c in text if c.isupper()) / len(text) if text else 0
+        'capital_letters': capital_letters,
+        'capital_ratio': capital_letters / len(text) if text else 0
     }
     
     return features
 
-def get_text_statistics(text: str) -> Dict[str, Any]:
+def get_text_statistics(text: Union[str, Document]) -> Dict[str, Any]:
     """Get comprehensive text statistics"""
-    features = extract_features(text)
-    tokens = tokenize_text(text)
+    document = Document.of(text)
+    features = extract_features(document)
+    tokens = document.tokens
     
     # Word frequency
-    word_freq = {}
-    for word in tokens:
-        word_freq[word] = word_freq.get(word, 0) + 1
+    word_freq = document.token_counts
     
     # Most common words
     most_common = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
     
     return {
         'basic_features': features,
-        'vocabulary_size': len(set(tokens)),
+        'vocabulary_size': len(word_freq),
         'most_common_words': most_common,
-        'unique_word_ratio': len(set(tokens)) / len(tokens) if tokens else 0
+        'unique_word_ratio': len(word_freq) / len(tokens) if tokens else 0
     }
 
+FORM_ARTIFACT_PATTERNS = (
+    re.compile(r'complaint\s*id\s*:?\s*\d+', re.IGNORECASE),
+    re.compile(r'date\s*:?\s*\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', re.IGNORECASE),
+    re.compile(r'time\s*:?\s*\d{1,2}:\d{2}', re.IGNORECASE)
+)
+REPEATED_CHARACTER_PATTERN = re.compile(r'(.)\1{3,}')
+PHONE_PATTERN = re.compile(r'\b\d{10}\b|\b\d{3}-\d{3}-\d{4}\b')
+EMAIL_ADDRESS_PATTERN = re.compile(r'\S+@\S+\.\S+')
+
 def clean_complaint_text(text: str) -> str:
     """Specifically clean complaint text for processing"""
     # Remove common complaint form artifacts
-    text = re.sub(r'complaint\s*id\s*:?\s*\d+', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'date\s*:?\s*\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'time\s*:?\s*\d{1,2}:\d{2}', '', text, flags=re.IGNORECASE)
+    for pattern in FORM_ARTIFACT_PATTERNS:
+        text = pattern.sub('', text)
     
     # Remove excessive repetition
-    text = re.sub(r'(.)\1{3,}', r'\1\1', text)  # Reduce repeated characters
+    text = REPEATED_CHARACTER_PATTERN.sub(r'\1\1', text)  # Reduce repeated characters
     
     # Clean up spacing
     text = ' '.join(text.split())
@@ -107,11 +154,11 @@ def validate_complaint_text(text: str) -> Dict[str, Any]:
         recommendations.append('Please describe your issue with more detail')
     
     # Check for contact info (which should be in separate fields)
-    if re.search(r'\b\d{10}\b|\b\d{3}-\d{3}-\d{4}\b', text):
+    if PHONE_PATTERN.search(text):
         issues.append('Contains phone number')
         recommendations.append('Please use the contact fields instead of including phone in description')
     
-    if re.search(r'\S+@\S+\.\S+', text):
+    if EMAIL_ADDRESS_PATTERN.search(text):
         issues.append('Contains email address')
         recommendations.append('Please use the contact fields instead of including email in description')
     
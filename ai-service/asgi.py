@@ -0,0 +1,193 @@
+"""ASGI entry point for the AI service.
+
+Serves /classify, /api/analyze/complaint, /api/analyze/stream and
+/api/chatbot/message with the same request and response contracts as the
+Flask app, but chatbot turns wait on Rasa with async I/O and CPU-bound
+inference runs in a bounded thread pool, so one process can hold thousands
+of concurrent chat sessions. The NDJSON stream is read as it arrives rather
+than buffered whole, as the WSGI bridge would. Every other route is
+delegated to the Flask app, which shares the same loaded models.
+    
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+# Before the app modules, which read their settings when imported
+load_dotenv()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from starlette.middleware.wsgi import WSGIMiddleware
+
+from app.api import analysis
+from app.api.routes import STREAM_CHUNK_SIZE
+from app.chatbot.async_rasa_connector import AsyncRasaConnector
+from app.chatbot.sessions import conversation_store
+from app.models.incremental import incremental_analyzer
+from app.utils.metrics import observe_request
+from main import app as flask_app
+
+# Inference is thread-safe, so a small pool keeps every core busy without
+# letting a burst of requests queue unbounded work behind the GIL
+inference_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('AI_INFERENCE_WORKERS', os.cpu_count() or 4)),
+    thread_name_prefix='inference'
+)
+rasa_connector = AsyncRasaConnector()
+
+app = FastAPI(title='AI Service')
+
+@app.middleware('http')
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    # Requests delegated to the Flask app are recorded by Flask itself
+    route = request.scope.get('route')
+    if isinstance(route, APIRoute):
+        observe_request(route.path, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+async def _analyze(text: str):
+    loop = asyncio.get_running_loop()
+    if analysis.micro_batcher is not None:
+        # Submitting looks up the cache and the live models, which may block
+        # (Redis, a model reload), so it runs in the pool; the batcher's own
+        # worker computes the result, awaited without holding a thread
+        future = await loop.run_in_executor(inference_executor, analysis.submit_text, text)
+        try:
+            # Shielded so a timeout leaves the queued item to the batcher
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                          analysis.micro_batcher.timeout)
+        except asyncio.TimeoutError:
+            return await loop.run_in_executor(inference_executor, analysis.analyze_directly, text)
+    
+    return await loop.run_in_executor(inference_executor, analysis.analyze_text, text)
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body is produced while the request body is read.
+    
+    StreamingResponse watches receive() for a client disconnect while it
+    streams, which would swallow the request body messages the generator is
+    waiting for; here a disconnect surfaces from request.stream() instead.
+    """
+    
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def _record_turns(session_id: str, message: str, prepared: dict, response: str) -> dict:
+    # May block on a shared backend, so it runs off the event loop
+    conversation_store.append_turn(session_id, 'User', message, prepared)
+    return conversation_store.append_turn(session_id, 'Bot', response)
+
+async def _get_json(request: Request) -> dict:
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+@app.on_event('shutdown')
+async def shutdown():
+    await rasa_connector.aclose()
+    inference_executor.shutdown(wait=False)
+
+@app.get('/health')
+async def health_check():
+    return JSONResponse({'status': 'healthy', 'service': 'AI Service'}, status_code=200)
+
+@app.post('/classify')
+async def classify_complaint(request: Request):
+    try:
+        data = await _get_json(request)
+        text = data.get('text', '')
+        
+        if not text:
+            return JSONResponse({'error': 'Text is required'}, status_code=400)
+        
+        result = await _analyze(text)
+        
+        return JSONResponse({
+            'category': result['category'],
+            'priority': result['priority'],
+            'sentiment': result['sentiment'],
+            'confidence': result['confidence']
+        }, status_code=200)
+    
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@app.post('/api/analyze/complaint')
+async def analyze_complaint(request: Request):
+    try:
+        data = await _get_json(request)
+        text = data.get('text', '')
+        
+        if not text:
+            return JSONResponse({'error': 'Text is required'}, status_code=400)
+        
+        result = await _analyze(text)
+        
+        return JSONResponse(analysis.format_analysis(result), status_code=200)
+    
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@app.post('/api/analyze/stream')
+async def analyze_stream(request: Request):
+    loop = asyncio.get_running_loop()
+    stream = analysis.NdjsonStream(STREAM_CHUNK_SIZE)
+    
+    async def results():
+        async for data in request.stream():
+            if stream.feed(data):
+                yield await loop.run_in_executor(inference_executor, stream.flush)
+        stream.close()
+        
+        output = await loop.run_in_executor(inference_executor, stream.flush)
+        if output:
+            yield output
+    
+    return _DuplexStreamingResponse(results(), media_type='application/x-ndjson')
+
+@app.post('/api/chatbot/message')
+async def chatbot_message(request: Request):
+    try:
+        data = await _get_json(request)
+        message = data.get('message', '')
+        session_id = data.get('session_id') or conversation_store.new_session_id()
+        
+        if not message:
+            return JSONResponse({'error': 'Message is required'}, status_code=400)
+        
+        # Process the message while waiting on Rasa; folding it into the
+        # session's analysis afterwards is cheap
+        loop = asyncio.get_running_loop()
+        response, prepared = await asyncio.gather(
+            rasa_connector.get_response_async(message, session_id),
+            loop.run_in_executor(inference_executor, incremental_analyzer.prepare, message)
+        )
+        
+        session = await loop.run_in_executor(
+            inference_executor, _record_turns, session_id, message, prepared, response
+        )
+        
+        return JSONResponse({
+            'response': response,
+            'session_id': session_id,
+            'analysis': session['analysis']
+        }, status_code=200)
+    
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+# Everything else (batch, retrain, model management, extraction, ...) is
+# served by the Flask app
+app.mount('/', WSGIMiddleware(flask_app))
@@ -0,0 +1,13 @@
+"""Benchmarks for the AI service hot paths.
+
+Run from the ai-service directory:
+    
+    python -m benchmarks run --sizes small,medium --output before.json
+    python -m benchmarks run --sizes small,medium --baseline before.json
+    python -m benchmarks compare before.json after.json --threshold 0.2
+
+Benchmarks are defined in benchmarks.suites and run on the synthetic
+corpus of benchmarks.corpus. Timings are medians over several runs after a
+warm-up; comparisons exit with status 1 when any benchmark got slower, or
+allocated more, than the baseline by more than the threshold.
+"""
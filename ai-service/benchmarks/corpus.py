@@ -0,0 +1,120 @@
+"""Synthetic complaints and chat transcripts for the benchmarks.
+
+Everything is generated from a seeded random.Random, so a given size and
+seed always yields the same corpus on every machine and run.
+"""
+import random
+from typing import Dict, List
+
+# Corpus sizes selectable by name on the command line
+SIZES = {
+    'small': 100,
+    'medium': 1000,
+    'large': 10000
+}
+
+# Category -> (priority, complaint templates); {product}, {amount}, ... are filled in below
+TEMPLATES = {
+    'Technical Support': ('Medium', [
+        "My {product} keeps disconnecting every few minutes",
+        "The {product} app crashes as soon as I open it",
+        "Internet connection is very slow since {date}",
+        "Error code {code} when I try to install the {product} update"
+    ]),
+    'Billing': ('High', [
+        "I was charged twice for the same service, {amount} taken on {date}",
+        "Overcharged on my monthly bill by {amount}",
+        "Urgent: wrong amount deducted from my account for order {order}",
+        "Why is there an extra fee of {amount} on my invoice?"
+    ]),
+    'Product Quality': ('High', [
+        "The {product} I received is damaged and scratched",
+        "{product} stopped working after one day",
+        "Terrible quality, the {product} broke within a week",
+        "The {product} is defective and makes a loud noise"
+    ]),
+    'Customer Service': ('Medium', [
+        "Customer service representative was rude and unhelpful",
+        "Nobody answered my emails for {days} days, very disappointed",
+        "I have called support {days} times and still no resolution",
+        "The agent hung up on me, this is unacceptable"
+    ]),
+    'Delivery': ('Medium', [
+        "My order {order} hasn't arrived yet, it was due on {date}",
+        "Received the wrong item instead of my {product}",
+        "Package was left outside in the rain and is ruined",
+        "Delivery is {days} days late with no tracking updates"
+    ]),
+    'General Inquiry': ('Low', [
+        "How do I change my password?",
+        "What are your opening hours on weekends?",
+        "Can I upgrade my {product} plan later?",
+        "Where can I find the manual for the {product}?"
+    ]),
+    'Refund Request': ('Medium', [
+        "I want to return this {product} and get a refund of {amount}",
+        "When will my refund for order {order} be processed?",
+        "Please refund {amount}, the service was cancelled on {date}",
+        "Still waiting for my refund after {days} days"
+    ]),
+    'Account Issues': ('Critical', [
+        "Cannot login to my account, it says my password is wrong",
+        "My account was hacked, please help immediately!",
+        "Locked out of my account after the last update",
+        "I never received the verification email at {email}"
+    ])
+}
+
+PRODUCTS = ['router', 'laptop', 'phone', 'smart TV', 'washing machine', 'headphones', 'modem', 'tablet']
+CLOSINGS = [
+    "", " Please help.", " This is urgent!", " I am very frustrated.", " Thank you.",
+    " Fix this ASAP!!", " Really disappointed with the service.", " I expect a call back today."
+]
+BOT_REPLIES = [
+    "I'm sorry to hear that. Could you share your order number?",
+    "Thanks for the details, let me check that for you.",
+    "I understand your frustration. I have escalated this to our team.",
+    "Could you confirm the email address on your account?",
+    "Is there anything else I can help you with?"
+]
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        product=rng.choice(PRODUCTS),
+        amount=f"${rng.randint(5, 500)}.{rng.randint(0, 99):02d}",
+        date=f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2024",
+        order=f"ORD{rng.randint(10000, 99999)}",
+        code=rng.randint(100, 999),
+        days=rng.randint(2, 14),
+        email=f"user{rng.randint(1, 999)}@example.com"
+    )
+
+def generate_complaints(size: int, seed: int = 42) -> List[Dict[str, str]]:
+    """``size`` labeled complaints as dicts with text, category and priority"""
+    rng = random.Random(seed)
+    categories = sorted(TEMPLATES)
+    complaints = []
+    for _ in range(size):
+        category = rng.choice(categories)
+        priority, templates = TEMPLATES[category]
+        # Run-on complaints with a second sentence now and then
+        text = _fill(rng.choice(templates), rng) + rng.choice(CLOSINGS)
+        if rng.random() < 0.3:
+            text += ' ' + _fill(rng.choice(templates), rng) + '.'
+        complaints.append({'text': text, 'category': category, 'priority': priority})
+    return complaints
+
+def generate_transcripts(size: int, turns: int = 8, seed: int = 42) -> List[str]:
+    """``size`` chat transcripts of ``turns`` alternating User:/Bot: lines"""
+    rng = random.Random(seed)
+    complaints = generate_complaints(size * turns, seed)
+    transcripts = []
+    for i in range(size):
+        lines = []
+        for turn in range(turns):
+            if turn % 2 == 0:
+                lines.append(f"User: {complaints[i * turns + turn]['text']}")
+            else:
+                lines.append(f"Bot: {rng.choice(BOT_REPLIES)}")
+        transcripts.append('\n'.join(lines))
+    return transcripts
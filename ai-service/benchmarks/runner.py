@@ -0,0 +1,193 @@
+"""Runs the suites in benchmarks.suites and compares results against a baseline"""
+import argparse
+import fnmatch
+import gc
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import suites
+from benchmarks.corpus import SIZES
+
+DEFAULT_REPEAT = 5
+# A benchmark slower (or hungrier) than the baseline by more than this is a regression
+DEFAULT_THRESHOLD = 0.2
+
+def discover() -> List[type]:
+    """Benchmark classes of the suites module, in definition order"""
+    return [
+        cls for cls in vars(suites).values()
+        if inspect.isclass(cls) and cls.__module__ == suites.__name__
+        and any(name.startswith(('time_', 'peakmem_')) for name in vars(cls))
+    ]
+
+def _time(call: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    call()  # Warm-up: lazy imports, caches, first-call allocations
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return {'median': statistics.median(samples), 'min': min(samples), 'repeat': repeat}
+
+def _peakmem(call: Callable[[], Any]) -> Dict[str, float]:
+    call()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'peak_bytes': peak}
+
+def run(sizes: List[int], pattern: str = '*', repeat: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """Run every benchmark matching ``pattern`` (e.g. 'Sentiment.*') at each size"""
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    for cls in discover():
+        names = [
+            name for name in vars(cls)
+            if name.startswith(('time_', 'peakmem_'))
+            and fnmatch.fnmatch(f"{cls.__name__}.{name}", pattern)
+        ]
+        if not names:
+            continue
+        
+        sized = getattr(cls, 'sized', True)
+        for size in (sizes if sized else [None]):
+            instance = cls()
+            args = (size,) if sized else ()
+            if hasattr(instance, 'setup'):
+                instance.setup(*args)
+            
+            for name in names:
+                method = getattr(instance, name)
+                key = f"{cls.__name__}.{name}" + (f"[{size}]" if sized else '')
+                call = lambda: method(*args)
+                
+                if name.startswith('time_'):
+                    result = _time(call, repeat or getattr(cls, 'repeat', DEFAULT_REPEAT))
+                    if sized:
+                        result['per_item_ms'] = result['median'] / size * 1000
+                        result['items_per_second'] = size / result['median'] if result['median'] else 0.0
+                else:
+                    result = _peakmem(call)
+                
+                results[key] = result
+                print(f"{key:<60} {_format(result)}", file=sys.stderr)
+    
+    return results
+
+def _format(result: Dict[str, Any]) -> str:
+    if 'peak_bytes' in result:
+        return f"{result['peak_bytes'] / 1024 / 1024:10.2f} MiB peak"
+    text = f"{result['median'] * 1000:10.2f} ms"
+    if 'items_per_second' in result:
+        text += f"  {result['per_item_ms']:8.4f} ms/item  {result['items_per_second']:10.0f} items/s"
+    return text
+
+def _metric(result: Dict[str, Any]) -> float:
+    return result['peak_bytes'] if 'peak_bytes' in result else result['median']
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Per-benchmark ratios of current to baseline, flagging regressions.
+    
+    A ratio above 1 + ``threshold`` is a regression and one below
+    1 / (1 + ``threshold``) an improvement; anything in between is noise.
+    Benchmarks missing from either side are skipped.
+    """
+    rows = []
+    for key, result in current['results'].items():
+        before = baseline['results'].get(key)
+        if before is None or not _metric(before):
+            continue
+        
+        ratio = _metric(result) / _metric(before)
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 / (1 + threshold):
+            status = 'improved'
+        else:
+            status = 'same'
+        rows.append({'benchmark': key, 'baseline': _metric(before), 'current': _metric(result),
+                     'ratio': ratio, 'status': status})
+    return rows
+
+def report(rows: List[Dict[str, Any]]) -> int:
+    """Print a comparison table; returns the number of regressions"""
+    for row in rows:
+        marker = {'regression': '!!', 'improved': '++', 'same': '  '}[row['status']]
+        print(f"{marker} {row['benchmark']:<60} {row['ratio']:6.2f}x  {row['status']}")
+    regressions = sum(1 for row in rows if row['status'] == 'regression')
+    print(f"{len(rows)} compared, {regressions} regressions")
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=suites.SERVICE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _parse_sizes(value: str) -> List[int]:
+    return [SIZES[size] if size in SIZES else int(size) for size in value.split(',') if size]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='AI service benchmarks')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subcommands.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--sizes', default='small,medium',
+                            help=f"Comma-separated corpus sizes, by name ({', '.join(SIZES)}) or count")
+    run_parser.add_argument('--bench', default='*', help="Only benchmarks matching this pattern, e.g. 'Sentiment.*'")
+    run_parser.add_argument('--repeat', type=int, default=None, help='Timed runs per benchmark')
+    run_parser.add_argument('--output', help='Write results to this JSON file')
+    run_parser.add_argument('--baseline', help='Compare against results from an earlier run')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Relative slowdown reported as a regression')
+    
+    compare_parser = subcommands.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Relative slowdown reported as a regression')
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return 1 if report(compare(baseline, current, args.threshold)) else 0
+    
+    current = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': run(_parse_sizes(args.sizes), args.bench, args.repeat)
+    }
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        return 1 if report(compare(baseline, current, args.threshold)) else 0
+    return 0
@@ -0,0 +1,142 @@
+"""Benchmark definitions, in the style of asv.
+
+Each class groups the benchmarks of one hot path. ``setup(size)`` builds
+the inputs outside the timed region; ``time_*`` methods are timed and
+``peakmem_*`` methods report the peak memory they allocate. Unless a class
+sets ``sized = False``, every benchmark runs once per corpus size and
+processes ``size`` items, so per-item latency and throughput can be derived.
+"""
+import atexit
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.corpus import generate_complaints, generate_transcripts
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@functools.lru_cache(maxsize=None)
+def trained_models():
+    """Category and priority pipelines fitted on a fixed synthetic corpus"""
+    from app.models.classifier import fit_models
+    
+    category_model, priority_model, _ = fit_models(generate_complaints(2000, seed=7))
+    return category_model, priority_model
+
+@functools.lru_cache(maxsize=None)
+def model_dir() -> str:
+    """A model directory holding trained_models(), for startup benchmarks"""
+    from app.models.store import ModelStore
+    
+    root = tempfile.mkdtemp(prefix='ai-service-benchmark-')
+    atexit.register(shutil.rmtree, root, True)
+    ModelStore(root).save(*trained_models(), {'source': 'benchmark'})
+    return root
+
+class TextProcessing:
+    def setup(self, size):
+        self.texts = [item['text'] for item in generate_complaints(size)]
+    
+    def time_get_text_statistics(self, size):
+        from app.utils.text_processing import get_text_statistics
+        
+        for text in self.texts:
+            get_text_statistics(text)
+
+class Classification:
+    def setup(self, size):
+        from app.models.classifier import ComplaintClassifier
+        
+        self.classifier = ComplaintClassifier(*trained_models(), version='benchmark')
+        # The same models scored through the sklearn pipelines instead of LinearScorer
+        self.pipeline_classifier = ComplaintClassifier(*trained_models(), version='benchmark')
+        self.pipeline_classifier.use_linear_scorer = False
+        self.texts = [item['text'] for item in generate_complaints(size)]
+    
+    def time_classify(self, size):
+        for text in self.texts:
+            self.classifier.classify(text)
+    
+    def time_classify_pipeline(self, size):
+        for text in self.texts:
+            self.pipeline_classifier.classify(text)
+    
+    def time_get_priority(self, size):
+        for text in self.texts:
+            self.classifier.get_priority(text)
+    
+    def time_analyze_batch(self, size):
+        self.classifier.analyze_batch(self.texts)
+    
+    def peakmem_analyze_batch(self, size):
+        self.classifier.analyze_batch(self.texts)
+
+class Sentiment:
+    def setup(self, size):
+        from app.models.sentiment import SentimentAnalyzer
+        
+        self.textblob = SentimentAnalyzer('textblob')
+        self.lexicon = SentimentAnalyzer('lexicon')
+        self.texts = [item['text'] for item in generate_complaints(size)]
+    
+    def time_analyze(self, size):
+        for text in self.texts:
+            self.textblob.analyze(text)
+    
+    def time_analyze_batch_textblob(self, size):
+        self.textblob.analyze_batch(self.texts)
+    
+    def time_analyze_batch_lexicon(self, size):
+        self.lexicon.analyze_batch(self.texts)
+    
+    def peakmem_analyze_batch_lexicon(self, size):
+        self.lexicon.analyze_batch(self.texts)
+
+class ComplaintExtraction:
+    def setup(self, size):
+        self.transcripts = generate_transcripts(size)
+        self.analysis = {'category': 'Billing', 'priority': 'high'}
+        self.user_info = {'name': 'Benchmark User', 'email': 'user@example.com'}
+    
+    def time_extract(self, size):
+        from app.utils.conversation import conversation_extractor
+        
+        for transcript in self.transcripts:
+            conversation_extractor.extract(transcript)
+    
+    def time_extract_complaint_data(self, size):
+        # Everything /api/extract-complaint-data does besides JSON handling
+        from app.api import routes
+        
+        for transcript in self.transcripts:
+            extracted = routes.conversation_extractor.extract(transcript)
+            routes._generate_complaint_title(extracted, self.analysis)
+            routes._format_complaint_description(extracted, self.user_info)
+            routes._extract_tags(extracted, self.analysis)
+            routes._suggest_actions(extracted, self.analysis)
+            routes._estimate_resolution_time(self.analysis)
+
+class Startup:
+    sized = False
+    repeat = 3
+    
+    def setup(self):
+        self.env = dict(os.environ, MODEL_DIR=model_dir())
+    
+    def time_import_service(self):
+        # A fresh interpreter importing main.py, which loads the stored models
+        subprocess.run(
+            [sys.executable, '-c', 'import main'],
+            cwd=SERVICE_DIR, env=self.env, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    
+    def time_import_service_fast_start(self):
+        subprocess.run(
+            [sys.executable, '-c', 'import main'],
+            cwd=SERVICE_DIR, env=dict(self.env, AI_FAST_START='true'), check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
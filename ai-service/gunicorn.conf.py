@@ -0,0 +1,21 @@
+import gc
+import os
+
+from dotenv import load_dotenv
+
+# The settings below, like the app's own, may come from .env
+load_dotenv()
+
+# Import main:app in the master so the AI models are loaded once and the
+# forked workers share those pages copy-on-write instead of each loading a copy
+preload_app = True
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+def pre_fork(server, worker):
+    # Move everything allocated during preload into the permanent generation so
+    # the workers' garbage collector doesn't touch (and un-share) those pages
+    gc.freeze()
@@ -1,52 +1,138 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from app.api.routes import api_bp
-from app.models.classifier import ComplaintClassifier
-from app.models.sentiment import SentimentAnalyzer
+import time
+
+_import_started = time.perf_counter()
+
 import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables first: the app modules below read their
+# settings (cache, micro-batcher, connectors, sessions) when imported
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
-
-# Register blueprints
-app.register_blueprint(api_bp, url_prefix='/api')
-
-# Initialize AI models
-classifier = ComplaintClassifier()
-sentiment_analyzer = SentimentAnalyzer()
+from flask import Flask, Response, g, request, jsonify
+from flask_cors import CORS
+from app.api.analysis import analyze_text
+from app.api.routes import api_bp
+from app.models.registry import registry
+from app.utils.metrics import CONTENT_TYPE, metrics, observe_request
+from app.utils.profiling import create_request_profiler
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({'status': 'healthy', 'service': 'AI Service'}), 200
+_import_seconds = time.perf_counter() - _import_started
 
-@app.route('/classify', methods=['POST'])
-def classify_complaint():
-    try:
-        data = request.get_json()
-        text = data.get('text', '')
-        
-        if not text:
-            return jsonify({'error': 'Text is required'}), 400
+def create_app() -> Flask:
+    """Build the Flask app and load the shared AI models once for this process"""
+    app = Flask(__name__)
+    CORS(app)
+    
+    # Register blueprints
+    app.register_blueprint(api_bp, url_prefix='/api')
+    
+    # Opt-in profiling and slow-request logging; None unless configured
+    request_profiler = create_request_profiler()
+    
+    def _route() -> str:
+        # Route pattern, not path, so ids in URLs don't explode the series
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        if request_profiler is not None:
+            g.request_trace = request_profiler.begin(request.method, _route(), request.path, request.headers)
+    
+    @app.after_request
+    def record_request_metrics(response):
+        elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+        observe_request(_route(), request.method, response.status_code, elapsed)
+        trace = g.get('request_trace')
+        if trace is not None:
+            request_profiler.finish(trace, response.status_code, elapsed)
+        return response
+    
+    @app.teardown_request
+    def close_request_trace(exception=None):
+        trace = g.get('request_trace')
+        if trace is not None:
+            trace.close()
+    
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        return Response(metrics.render(), content_type=CONTENT_TYPE)
+    
+    def _profiling_forbidden():
+        if request_profiler.token is None:
+            return jsonify({'error': 'Profiling endpoints need AI_PROFILING_TOKEN to be set'}), 403
+        return jsonify({'error': 'Invalid profiling token'}), 403
+    
+    @app.route('/admin/profile', methods=['GET'])
+    def profile_stacks():
+        """Collapsed stacks of the profiled requests, for flamegraph.pl or speedscope"""
+        if request_profiler is None or request_profiler.sampler is None:
+            return jsonify({'error': 'Profiling is disabled; set AI_PROFILING=true'}), 404
+        if not request_profiler.authorized(request.headers):
+            return _profiling_forbidden()
         
-        # Classify complaint
-        category = classifier.classify(text)
-        priority = classifier.get_priority(text)
-        sentiment = sentiment_analyzer.analyze(text)
+        reset = request.args.get('reset', 'false').lower() == 'true'
+        return Response(request_profiler.collapsed_stacks(reset), content_type='text/plain; charset=utf-8')
+    
+    @app.route('/admin/slow-requests', methods=['GET'])
+    def slow_requests():
+        """Recent requests over AI_SLOW_REQUEST_MS with their stage breakdown"""
+        if request_profiler is None or request_profiler.slow_threshold is None:
+            return jsonify({'error': 'Slow-request logging is disabled; set AI_SLOW_REQUEST_MS'}), 404
+        if not request_profiler.authorized(request.headers):
+            return _profiling_forbidden()
         
         return jsonify({
-            'category': category,
-            'priority': priority,
-            'sentiment': sentiment,
-            'confidence': classifier.get_confidence()
+            'threshold_ms': request_profiler.slow_threshold * 1000,
+            'requests': request_profiler.slow_requests()
         }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        return jsonify({'status': 'healthy', 'service': 'AI Service'}), 200
+    
+    @app.route('/classify', methods=['POST'])
+    def classify_complaint():
+        try:
+            data = request.get_json()
+            text = data.get('text', '')
+            
+            if not text:
+                return jsonify({'error': 'Text is required'}), 400
+            
+            # Classify complaint
+            result = analyze_text(text)
+            
+            return jsonify({
+                'category': result['category'],
+                'priority': result['priority'],
+                'sentiment': result['sentiment'],
+                'confidence': result['confidence']
+            }), 200
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    # Initialize AI models (shared with the api blueprint through the registry).
+    # In fast-start mode they are loaded by the first request that needs them.
+    fast_start = os.environ.get('AI_FAST_START', 'False').lower() == 'true'
+    models_started = time.perf_counter()
+    if not fast_start:
+        registry.preload()
+    models_seconds = time.perf_counter() - models_started
+    
+    # One line per start so cold-start regressions show up in the logs;
+    # run `python -X importtime main.py` for a per-module breakdown
+    print(
+        f"AI service startup: imports {_import_seconds:.3f}s, "
+        f"models {'deferred' if fast_start else f'{models_seconds:.3f}s'}, "
+        f"total {time.perf_counter() - _import_started:.3f}s"
+    )
+    
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read when the app modules are imported, so they are fixed here,
+# before any test imports them. Models are trained into a throwaway store.
+os.environ['MODEL_DIR'] = tempfile.mkdtemp(prefix='ai-service-models-')
+os.environ.setdefault('AI_ONLINE_CHECKPOINT_EVERY', '1000')
+os.environ.setdefault('AI_ONLINE_CHECKPOINT_SECONDS', '3600')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session')
+def client():
+    from main import app
+    
+    app.config['TESTING'] = True
+    return app.test_client()
@@ -0,0 +1,24 @@
+def test_incremental_state_round_trip(client):
+    response = client.post('/api/analyze/incremental', json={'message': 'My bill was charged twice'})
+    assert response.status_code == 200
+    state = response.get_json()['state']
+    
+    response = client.post('/api/analyze/incremental', json={
+        'message': 'Please refund the overcharge', 'state': state
+    })
+    assert response.status_code == 200
+    assert response.get_json()['state']['messages'] == 2
+
+def test_incremental_rejects_malformed_state(client):
+    response = client.post('/api/analyze/incremental', json={'message': 'My bill was charged twice'})
+    state = response.get_json()['state']
+    state['terms'] = ['bill', 'charged']
+    
+    response = client.post('/api/analyze/incremental', json={'message': 'Still waiting', 'state': state})
+    assert response.status_code == 400
+    assert 'terms' in response.get_json()['error']
+    
+    response = client.post('/api/analyze/incremental', json={
+        'message': 'Still waiting', 'state': {'messages': 1}
+    })
+    assert response.status_code == 400
@@ -0,0 +1,41 @@
+import time
+
+from app.models.registry import registry
+from app.models.training import online_learner
+from benchmarks.corpus import generate_complaints
+
+def _class_count(pipeline) -> float:
+    return float(pipeline.named_steps['classifier'].class_count_.sum())
+
+def test_online_update_survives_retrain(client):
+    training_data = generate_complaints(120, seed=7)
+    sample = generate_complaints(1, seed=8)
+    
+    response = client.post('/api/models/update', json={'samples': sample})
+    assert response.status_code == 200
+    assert response.get_json()['checkpoint_version'] is None
+    
+    response = client.post('/api/models/retrain', json={'training_data': training_data})
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+    
+    deadline = time.monotonic() + 120
+    while True:
+        job = client.get(status_url).get_json()
+        if job['status'] != 'running' or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    assert job['status'] == 'completed', job['error']
+    
+    # The pending sample is re-applied on top of the retrained models
+    live = registry.get_classifier()
+    retrained_count = _class_count(live.store.load(job['version'])[0])
+    assert live.version == job['version']
+    assert live.pending_updates == 1
+    assert _class_count(live.category_model) == retrained_count + 1
+    
+    # ...and saved by the next checkpoint instead of being dropped
+    registry.update_classifier(online_learner._checkpoint)
+    category_model, _, version = live.store.load()
+    assert version == registry.get_classifier().version != job['version']
+    assert _class_count(category_model) == retrained_count + 1
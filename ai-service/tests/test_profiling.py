@@ -0,0 +1,20 @@
+from app.utils.profiling import RequestProfiler
+
+def test_profiling_needs_a_configured_token():
+    profiler = RequestProfiler(profiling=True, slow_threshold=0.0)
+    headers = {RequestProfiler.PROFILE_HEADER: '1'}
+    
+    assert not profiler.authorized(headers)
+    trace = profiler.begin('GET', '/health', '/health', headers)
+    assert not trace.profiled
+    trace.close()
+
+def test_profiling_with_token():
+    profiler = RequestProfiler(profiling=True, token='secret')
+    
+    assert not profiler.authorized({RequestProfiler.TOKEN_HEADER: 'wrong'})
+    trace = profiler.begin('GET', '/health', '/health', {
+        RequestProfiler.PROFILE_HEADER: '1', RequestProfiler.TOKEN_HEADER: 'secret'
+    })
+    assert trace.profiled
+    trace.close()